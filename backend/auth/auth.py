@@ -1,11 +1,15 @@
 import os
+import time
+import threading
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import HTTPException, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlmodel import Session, select
+from sqlmodel import Session, select, exists
+from sqlalchemy.orm import make_transient_to_detached
 from backend.models.models import User, UserRole
 from backend.models.database import get_session
 
@@ -13,10 +17,52 @@ from backend.models.database import get_session
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-this-in-production")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
+USER_CACHE_TTL_SECONDS = int(os.getenv("USER_CACHE_TTL_SECONDS", "30"))
+USER_CACHE_MAX_SIZE = 10_000
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+# Verified against when the email is unknown so failed logins take the same
+# time whether or not the account exists
+DUMMY_PASSWORD_HASH = pwd_context.hash("dummy-password-for-timing")
 security = HTTPBearer()
 
+# Short-lived LRU cache of authenticated users keyed by JWT subject (email), so
+# chatty clients don't pay a SELECT on every authenticated request. It is
+# per-process: with several workers, a deactivated or deleted user can keep
+# authenticating on the other workers for up to USER_CACHE_TTL_SECONDS.
+# Admin-guarded routes bypass it and always read the row.
+_user_cache: "OrderedDict[str, Tuple[float, User]]" = OrderedDict()
+_user_cache_lock = threading.Lock()
+
+def _get_cached_user(email: str, session: Session) -> Optional[User]:
+    with _user_cache_lock:
+        entry = _user_cache.get(email)
+        if entry is None:
+            return None
+        expires_at, snapshot = entry
+        if expires_at < time.monotonic():
+            _user_cache.pop(email, None)
+            return None
+        _user_cache.move_to_end(email)
+    # Attach a copy to this request's session without re-selecting the row
+    return session.merge(snapshot, load=False)
+
+def _cache_user(user: User) -> None:
+    snapshot = User(**user.model_dump())
+    make_transient_to_detached(snapshot)
+    with _user_cache_lock:
+        _user_cache[user.email] = (time.monotonic() + USER_CACHE_TTL_SECONDS, snapshot)
+        _user_cache.move_to_end(user.email)
+        if len(_user_cache) > USER_CACHE_MAX_SIZE:
+            _user_cache.popitem(last=False)
+
+def invalidate_cached_user(email: str) -> None:
+    """Drop a user from this process's auth cache after their row changes"""
+    with _user_cache_lock:
+        _user_cache.pop(email, None)
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
@@ -49,10 +95,7 @@ def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
     except JWTError:
         raise credentials_exception
 
-def get_current_user(
-    email: str = Depends(verify_token),
-    session: Session = Depends(get_session)
-) -> User:
+def _load_user(email: str, session: Session) -> User:
     statement = select(User).where(User.email == email)
     user = session.exec(statement).first()
     if user is None:
@@ -62,10 +105,26 @@ def get_current_user(
         )
     return user
 
+def get_current_user(
+    email: str = Depends(verify_token),
+    session: Session = Depends(get_session)
+) -> User:
+    user = _get_cached_user(email, session)
+    if user is not None:
+        return user
+    
+    user = _load_user(email, session)
+    _cache_user(user)
+    return user
+
 def get_current_admin(
-    current_user: User = Depends(get_current_user)
+    email: str = Depends(verify_token),
+    session: Session = Depends(get_session)
 ) -> User:
-    if current_user.role != UserRole.ADMIN:
+    # Role and status come from the database, not the auth cache, so a demoted
+    # or deactivated admin loses access at once on every worker
+    current_user = _load_user(email, session)
+    if current_user.role != UserRole.ADMIN or not current_user.is_active:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Admin access required"
@@ -76,31 +135,12 @@ def authenticate_user(email: str, password: str, session: Session) -> Optional[U
     statement = select(User).where(User.email == email)
     user = session.exec(statement).first()
     if not user:
+        verify_password(password, DUMMY_PASSWORD_HASH)
         return None
     if not verify_password(password, user.hashed_password):
         return None
     return user
 
-def create_admin_user(session: Session, email: str, password: str, full_name: str = None) -> User:
-    """Create an admin user - should only be used during setup"""
-    # Check if admin already exists
-    existing_admin = session.exec(select(User).where(User.role == UserRole.ADMIN)).first()
-    if existing_admin:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Admin user already exists"
-        )
-    
-    # Create admin user
-    hashed_password = get_password_hash(password)
-    admin_user = User(
-        email=email,
-        hashed_password=hashed_password,
-        full_name=full_name,
-        role=UserRole.ADMIN,
-        is_active=True
-    )
-    session.add(admin_user)
-    session.commit()
-    session.refresh(admin_user)
-    return admin_user
\ No newline at end of file
+def any_admin_exists(session: Session) -> bool:
+    """Check for an admin account without loading the row"""
+    return session.exec(select(exists().where(User.role == UserRole.ADMIN))).one()
@@ -1,6 +1,7 @@
-from fastapi import FastAPI, Depends, Request
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.security import HTTPBearer
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
 from contextlib import asynccontextmanager
 import uvicorn
 import os
@@ -30,7 +31,8 @@ app = FastAPI(
     title="AI-Powered Risk & Scenario Advisor API",
     description="Backend API for retail investment risk assessment and scenario analysis",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # Get CORS origins from environment
@@ -45,6 +47,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress larger responses; scenario narratives and JSON blobs shrink well
+app.add_middleware(GZipMiddleware, minimum_size=1000, compresslevel=5)
+
 # Add custom middleware
 app.middleware("http")(security_middleware_func)
 
@@ -6,31 +6,46 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Patterns are compiled once at import so request handlers only pay for matching
+SQL_INJECTION_PATTERNS = [
+    re.compile(pattern, re.IGNORECASE) for pattern in (
+        r"(\b(union|select|insert|update|delete|drop|create|alter|exec|execute)\b)",
+        r"(--|#|/\*|\*/)",
+        r"(\b(and|or)\b\s+\d+\s*[=<>])",
+        r"(\b(union|select)\b.*\bfrom\b)",
+    )
+]
+
+XSS_PATTERNS = [
+    re.compile(pattern, re.IGNORECASE) for pattern in (
+        r"<script[^>]*>.*?</script>",
+        r"javascript:",
+        r"on\w+\s*=",
+        r"<iframe[^>]*>",
+        r"<object[^>]*>",
+        r"<embed[^>]*>",
+    )
+]
+
+PATH_TRAVERSAL_PATTERNS = [
+    re.compile(pattern, re.IGNORECASE) for pattern in (
+        r"\.\./",
+        r"\.\.\\",
+        r"%2e%2e%2f",
+        r"%2e%2e%5c",
+    )
+]
+
+EMAIL_PATTERN = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+WHITESPACE_PATTERN = re.compile(r'\s+')
+PASSWORD_SPECIAL_CHARACTERS = frozenset('!@#$%^&*(),.?":{}|<>')
+
 class SecurityMiddleware:
     def __init__(self):
         # Patterns for potentially malicious input
-        self.sql_injection_patterns = [
-            r"(\b(union|select|insert|update|delete|drop|create|alter|exec|execute)\b)",
-            r"(--|#|/\*|\*/)",
-            r"(\b(and|or)\b\s+\d+\s*[=<>])",
-            r"(\b(union|select)\b.*\bfrom\b)",
-        ]
-        
-        self.xss_patterns = [
-            r"<script[^>]*>.*?</script>",
-            r"javascript:",
-            r"on\w+\s*=",
-            r"<iframe[^>]*>",
-            r"<object[^>]*>",
-            r"<embed[^>]*>",
-        ]
-        
-        self.path_traversal_patterns = [
-            r"\.\./",
-            r"\.\.\\",
-            r"%2e%2e%2f",
-            r"%2e%2e%5c",
-        ]
+        self.sql_injection_patterns = SQL_INJECTION_PATTERNS
+        self.xss_patterns = XSS_PATTERNS
+        self.path_traversal_patterns = PATH_TRAVERSAL_PATTERNS
     
     def sanitize_input(self, text: str) -> str:
         """Sanitize user input to prevent injection attacks"""
@@ -44,7 +59,7 @@ class SecurityMiddleware:
         sanitized = sanitized.replace('\x00', '')
         
         # Normalize whitespace
-        sanitized = re.sub(r'\s+', ' ', sanitized).strip()
+        sanitized = WHITESPACE_PATTERN.sub(' ', sanitized).strip()
         
         return sanitized
     
@@ -57,19 +72,19 @@ class SecurityMiddleware:
         
         # Check for SQL injection patterns
         for pattern in self.sql_injection_patterns:
-            if re.search(pattern, text_lower, re.IGNORECASE):
+            if pattern.search(text_lower):
                 logger.warning(f"Potential SQL injection detected in {input_type}: {text[:50]}...")
                 return False
         
         # Check for XSS patterns
         for pattern in self.xss_patterns:
-            if re.search(pattern, text_lower, re.IGNORECASE):
+            if pattern.search(text_lower):
                 logger.warning(f"Potential XSS detected in {input_type}: {text[:50]}...")
                 return False
         
         # Check for path traversal
         for pattern in self.path_traversal_patterns:
-            if re.search(pattern, text_lower, re.IGNORECASE):
+            if pattern.search(text_lower):
                 logger.warning(f"Potential path traversal detected in {input_type}: {text[:50]}...")
                 return False
         
@@ -80,8 +95,7 @@ class SecurityMiddleware:
         if not email:
             return False
         
-        email_pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-        return bool(re.match(email_pattern, email))
+        return bool(EMAIL_PATTERN.match(email))
     
     def validate_password_strength(self, password: str) -> bool:
         """Validate password strength"""
@@ -89,12 +103,23 @@ class SecurityMiddleware:
             return False
         
         # Check for at least one uppercase, lowercase, digit, and special character
-        has_upper = re.search(r'[A-Z]', password)
-        has_lower = re.search(r'[a-z]', password)
-        has_digit = re.search(r'\d', password)
-        has_special = re.search(r'[!@#$%^&*(),.?":{}|<>]', password)
-        
-        return bool(has_upper and has_lower and has_digit and has_special)
+        # in a single pass, stopping as soon as all four have been seen
+        has_upper = has_lower = has_digit = has_special = False
+        for char in password:
+            if 'A' <= char <= 'Z':
+                has_upper = True
+            elif 'a' <= char <= 'z':
+                has_lower = True
+            elif char.isdecimal():
+                has_digit = True
+            elif char in PASSWORD_SPECIAL_CHARACTERS:
+                has_special = True
+            else:
+                continue
+            if has_upper and has_lower and has_digit and has_special:
+                return True
+        
+        return False
 
 # Global security middleware instance
 security_middleware = SecurityMiddleware()
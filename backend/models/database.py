@@ -1,15 +1,30 @@
 from sqlmodel import SQLModel, create_engine, Session
+from sqlalchemy.orm import sessionmaker
 from typing import Generator
 import os
 
 # Use in-memory SQLite database for simplicity
 DATABASE_URL = "sqlite:///./investment_advisor.db"
 
-engine = create_engine(DATABASE_URL, echo=True, connect_args={"check_same_thread": False})
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "20"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+
+# Size the pool above the threadpool's working set so sync handlers and
+# dependencies can't starve each other of connections under load
+engine = create_engine(
+    DATABASE_URL,
+    echo=True,
+    connect_args={"check_same_thread": False},
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_recycle=3600,
+    pool_pre_ping=True
+)
+SessionLocal = sessionmaker(bind=engine, class_=Session)
 
 def create_db_and_tables():
     SQLModel.metadata.create_all(engine)
 
 def get_session() -> Generator[Session, None, None]:
-    with Session(engine) as session:
+    with SessionLocal() as session:
         yield session
\ No newline at end of file
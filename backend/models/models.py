@@ -1,4 +1,4 @@
-from sqlmodel import SQLModel, Field, Relationship
+from sqlmodel import SQLModel, Field, Relationship, Index
 from typing import Optional, List
 from datetime import datetime
 from enum import Enum
@@ -17,6 +17,11 @@ class UserRole(str, Enum):
     ADMIN = "ADMIN"
 
 class User(SQLModel, table=True):
+    __table_args__ = (
+        # Backs the new-user and active-user counts on the admin dashboard
+        Index("ix_user_created_active", "created_at", "is_active"),
+    )
+    
     id: Optional[int] = Field(default=None, primary_key=True)
     email: str = Field(unique=True, index=True)
     hashed_password: str
@@ -32,10 +37,16 @@ class User(SQLModel, table=True):
     exports: List["Export"] = Relationship(back_populates="user")
 
 class Portfolio(SQLModel, table=True):
+    __table_args__ = (
+        # Backs the per-user "latest portfolio" lookups (ORDER BY updated_at DESC LIMIT 1)
+        Index("ix_portfolio_user_updated", "user_id", "updated_at"),
+    )
+    
     id: Optional[int] = Field(default=None, primary_key=True)
     user_id: int = Field(foreign_key="user.id")
     name: str = Field(default="My Portfolio")
     total_value: float = Field(default=0.0)
+    visualizations_cache: Optional[str] = None  # JSON string of the rendered plotly charts
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
     
@@ -45,13 +56,13 @@ class Portfolio(SQLModel, table=True):
 
 class Holding(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
-    portfolio_id: int = Field(foreign_key="portfolio.id")
+    portfolio_id: int = Field(foreign_key="portfolio.id", index=True)
     company_name: str
-    symbol: str
+    symbol: str = Field(index=True)
     quantity: int
     current_price: float
     total_value: float
-    sector: Optional[str] = None
+    sector: Optional[str] = Field(default=None, index=True)
     pe_ratio: Optional[float] = None
     dividend_yield: Optional[float] = None
     created_at: datetime = Field(default_factory=datetime.utcnow)
@@ -60,6 +71,11 @@ class Holding(SQLModel, table=True):
     portfolio: Portfolio = Relationship(back_populates="holdings")
 
 class RiskAssessment(SQLModel, table=True):
+    __table_args__ = (
+        # Backs the per-user "latest risk assessment" lookups (ORDER BY created_at DESC LIMIT 1)
+        Index("ix_riskassessment_user_created", "user_id", "created_at"),
+    )
+    
     id: Optional[int] = Field(default=None, primary_key=True)
     user_id: int = Field(foreign_key="user.id")
     score: int
@@ -73,6 +89,11 @@ class RiskAssessment(SQLModel, table=True):
     user: User = Relationship(back_populates="risk_assessments")
 
 class Scenario(SQLModel, table=True):
+    __table_args__ = (
+        # Backs the per-user scenario listings (ORDER BY created_at DESC)
+        Index("ix_scenario_user_created", "user_id", "created_at"),
+    )
+    
     id: Optional[int] = Field(default=None, primary_key=True)
     user_id: int = Field(foreign_key="user.id")
     scenario_text: str
@@ -89,6 +110,11 @@ class Scenario(SQLModel, table=True):
     user: User = Relationship(back_populates="scenarios")
 
 class Export(SQLModel, table=True):
+    __table_args__ = (
+        # Backs the per-user export history (ORDER BY created_at DESC)
+        Index("ix_export_user_created", "user_id", "created_at"),
+    )
+    
     id: Optional[int] = Field(default=None, primary_key=True)
     user_id: int = Field(foreign_key="user.id")
     export_type: ExportType
@@ -139,6 +165,33 @@ class UserDataResponse(SQLModel):
     scenarios: List[dict] = []
     exports: List[dict] = []
 
+# Listing response models; rows are validated straight from ORM attributes
+class ScenarioSummary(SQLModel):
+    scenario_id: int = Field(schema_extra={"validation_alias": "id"})
+    scenario_text: str
+    created_at: datetime
+
+class ScenarioListResponse(SQLModel):
+    scenarios: List[ScenarioSummary]
+    count: int
+    limit: int
+    offset: int
+
+class ExportHistoryItem(SQLModel):
+    export_id: int = Field(schema_extra={"validation_alias": "id"})
+    export_type: ExportType
+    filename: str
+    include_risk_profile: bool
+    include_portfolio: bool
+    include_scenarios: bool
+    created_at: datetime
+
+class ExportHistoryResponse(SQLModel):
+    exports: List[ExportHistoryItem]
+    count: int
+    limit: int
+    offset: int
+
 # Admin Dashboard Response Models
 class AdminUserSummary(SQLModel):
     id: int
@@ -1,9 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlmodel import Session, select, func
 from typing import List, Optional
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import json
+import mmap
 import os
+import re
 from collections import Counter
 
 from backend.models.database import get_session
@@ -12,10 +14,31 @@ from backend.models.models import (
     UserRole, AdminUserSummary, AdminPortfolioSummary, AdminRiskAssessmentSummary,
     AdminScenarioSummary, AdminExportSummary, AdminDashboardStats, AdminSystemLog
 )
-from backend.auth.auth import get_current_admin
+from backend.auth.auth import get_current_admin, invalidate_cached_user
+from backend.services.response_cache import response_cache
+import asyncio
 
 router = APIRouter(prefix="/api/v1/admin", tags=["admin"])
 
+# Matches the file handler format from backend.utils.logger:
+# timestamp - module - level - function:line - message
+LOG_LINE_PATTERN = re.compile(
+    r'^(?P<timestamp>\S+ \S+) - (?P<module>\S+) - (?P<level>\w+) - '
+    r'(?P<function>[^:\s]+):(?P<line>\d+) - (?P<message>.*)$'
+)
+
+def _read_lines_reversed(file_path: str):
+    """Yield lines of a text file newest-first without loading the whole file"""
+    with open(file_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            end = len(mm)
+            while end > 0:
+                start = mm.rfind(b'\n', 0, end - 1) + 1
+                yield mm[start:end].decode('utf-8', errors='replace')
+                end = start
+
 @router.get("/dashboard/stats", response_model=AdminDashboardStats)
 async def get_dashboard_stats(
     current_admin: User = Depends(get_current_admin),
@@ -23,22 +46,21 @@ async def get_dashboard_stats(
 ):
     """Get comprehensive dashboard statistics"""
     
-    # User statistics
-    total_users = session.exec(select(func.count(User.id))).first()
-    active_users = session.exec(select(func.count(User.id)).where(User.is_active == True)).first()
-    
-    # Time-based user statistics
-    now = datetime.utcnow()
-    week_ago = now - timedelta(days=7)
-    month_ago = now - timedelta(days=30)
-    
-    new_users_this_week = session.exec(
-        select(func.count(User.id)).where(User.created_at >= week_ago)
-    ).first()
-    
-    new_users_this_month = session.exec(
-        select(func.count(User.id)).where(User.created_at >= month_ago)
-    ).first()
+    # Time windows are bucketed to the hour so the bounds stay stable between calls.
+    # created_at is stored as naive UTC, so compare against naive UTC as well.
+    hour = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0, tzinfo=None)
+    week_ago = hour - timedelta(days=7)
+    month_ago = hour - timedelta(days=30)
+    
+    # User statistics in a single aggregate pass
+    total_users, active_users, new_users_this_week, new_users_this_month = session.exec(
+        select(
+            func.count(User.id),
+            func.count(User.id).filter(User.is_active == True),
+            func.count(User.id).filter(User.created_at >= week_ago),
+            func.count(User.id).filter(User.created_at >= month_ago),
+        )
+    ).one()
     
     # Portfolio statistics
     total_portfolios = session.exec(select(func.count(Portfolio.id))).first()
@@ -158,35 +180,39 @@ async def get_all_portfolios(
 ):
     """Get all portfolios with user information"""
     
-    portfolios = session.exec(
-        select(Portfolio)
+    # Project just the columns the summary needs, with the owner's details
+    # and holdings count coming back in the same query
+    rows = session.exec(
+        select(
+            Portfolio.id,
+            Portfolio.name,
+            Portfolio.total_value,
+            Portfolio.created_at,
+            Portfolio.updated_at,
+            User.email,
+            User.full_name,
+            func.count(Holding.id).label('holdings_count')
+        )
         .join(User)
+        .outerjoin(Holding)
+        .group_by(Portfolio.id, User.id)
         .offset(skip)
         .limit(limit)
     ).all()
     
-    portfolio_summaries = []
-    for portfolio in portfolios:
-        # Get user info
-        user = session.exec(select(User).where(User.id == portfolio.user_id)).first()
-        
-        # Count holdings
-        holdings_count = session.exec(
-            select(func.count(Holding.id)).where(Holding.portfolio_id == portfolio.id)
-        ).first() or 0
-        
-        portfolio_summaries.append(AdminPortfolioSummary(
-            id=portfolio.id,
-            user_email=user.email if user else "Unknown",
-            user_full_name=user.full_name if user else None,
-            name=portfolio.name,
-            total_value=portfolio.total_value,
-            holdings_count=holdings_count,
-            created_at=portfolio.created_at,
-            updated_at=portfolio.updated_at
-        ))
-    
-    return portfolio_summaries
+    return [
+        AdminPortfolioSummary(
+            id=row.id,
+            user_email=row.email,
+            user_full_name=row.full_name,
+            name=row.name,
+            total_value=row.total_value,
+            holdings_count=row.holdings_count,
+            created_at=row.created_at,
+            updated_at=row.updated_at
+        )
+        for row in rows
+    ]
 
 @router.get("/risk-assessments", response_model=List[AdminRiskAssessmentSummary])
 async def get_all_risk_assessments(
@@ -197,27 +223,31 @@ async def get_all_risk_assessments(
 ):
     """Get all risk assessments with user information"""
     
-    risk_assessments = session.exec(
-        select(RiskAssessment)
+    rows = session.exec(
+        select(
+            RiskAssessment.id,
+            RiskAssessment.score,
+            RiskAssessment.category,
+            RiskAssessment.created_at,
+            User.email,
+            User.full_name
+        )
         .join(User)
         .offset(skip)
         .limit(limit)
     ).all()
     
-    risk_summaries = []
-    for assessment in risk_assessments:
-        user = session.exec(select(User).where(User.id == assessment.user_id)).first()
-        
-        risk_summaries.append(AdminRiskAssessmentSummary(
-            id=assessment.id,
-            user_email=user.email if user else "Unknown",
-            user_full_name=user.full_name if user else None,
-            score=assessment.score,
-            category=assessment.category,
-            created_at=assessment.created_at
-        ))
-    
-    return risk_summaries
+    return [
+        AdminRiskAssessmentSummary(
+            id=row.id,
+            user_email=row.email,
+            user_full_name=row.full_name,
+            score=row.score,
+            category=row.category,
+            created_at=row.created_at
+        )
+        for row in rows
+    ]
 
 @router.get("/scenarios", response_model=List[AdminScenarioSummary])
 async def get_all_scenarios(
@@ -228,27 +258,31 @@ async def get_all_scenarios(
 ):
     """Get all scenarios with user information"""
     
-    scenarios = session.exec(
-        select(Scenario)
+    rows = session.exec(
+        select(
+            Scenario.id,
+            Scenario.scenario_text,
+            Scenario.risk_assessment,
+            Scenario.created_at,
+            User.email,
+            User.full_name
+        )
         .join(User)
         .offset(skip)
         .limit(limit)
     ).all()
     
-    scenario_summaries = []
-    for scenario in scenarios:
-        user = session.exec(select(User).where(User.id == scenario.user_id)).first()
-        
-        scenario_summaries.append(AdminScenarioSummary(
-            id=scenario.id,
-            user_email=user.email if user else "Unknown",
-            user_full_name=user.full_name if user else None,
-            scenario_text=scenario.scenario_text,
-            risk_assessment=scenario.risk_assessment,
-            created_at=scenario.created_at
-        ))
-    
-    return scenario_summaries
+    return [
+        AdminScenarioSummary(
+            id=row.id,
+            user_email=row.email,
+            user_full_name=row.full_name,
+            scenario_text=row.scenario_text,
+            risk_assessment=row.risk_assessment,
+            created_at=row.created_at
+        )
+        for row in rows
+    ]
 
 @router.get("/exports", response_model=List[AdminExportSummary])
 async def get_all_exports(
@@ -259,30 +293,37 @@ async def get_all_exports(
 ):
     """Get all exports with user information"""
     
-    exports = session.exec(
-        select(Export)
+    rows = session.exec(
+        select(
+            Export.id,
+            Export.export_type,
+            Export.filename,
+            Export.include_risk_profile,
+            Export.include_portfolio,
+            Export.include_scenarios,
+            Export.created_at,
+            User.email,
+            User.full_name
+        )
         .join(User)
         .offset(skip)
         .limit(limit)
     ).all()
     
-    export_summaries = []
-    for export in exports:
-        user = session.exec(select(User).where(User.id == export.user_id)).first()
-        
-        export_summaries.append(AdminExportSummary(
-            id=export.id,
-            user_email=user.email if user else "Unknown",
-            user_full_name=user.full_name if user else None,
-            export_type=export.export_type,
-            filename=export.filename,
-            include_risk_profile=export.include_risk_profile,
-            include_portfolio=export.include_portfolio,
-            include_scenarios=export.include_scenarios,
-            created_at=export.created_at
-        ))
-    
-    return export_summaries
+    return [
+        AdminExportSummary(
+            id=row.id,
+            user_email=row.email,
+            user_full_name=row.full_name,
+            export_type=row.export_type,
+            filename=row.filename,
+            include_risk_profile=row.include_risk_profile,
+            include_portfolio=row.include_portfolio,
+            include_scenarios=row.include_scenarios,
+            created_at=row.created_at
+        )
+        for row in rows
+    ]
 
 @router.get("/system-logs", response_model=List[AdminSystemLog])
 async def get_system_logs(
@@ -297,55 +338,38 @@ async def get_system_logs(
     log_file = os.getenv("LOG_FILE", "app.log")
     logs = []
     
+    # Normalise filters once instead of per line
+    level_filter = level.upper() if level else None
+    search_filter = search.lower() if search else None
+    
     try:
-        with open(log_file, 'r', encoding='utf-8') as f:
-            log_lines = f.readlines()
-        
-        # Parse log lines and filter
-        for line in log_lines:
-            try:
-                # Parse log line format: timestamp - module - level - function:line - message
-                parts = line.strip().split(' - ')
-                if len(parts) >= 4:
-                    timestamp = parts[0]
-                    module = parts[1]
-                    level_info = parts[2]
-                    message = ' - '.join(parts[3:])
-                    
-                    # Extract level and function:line
-                    level_parts = level_info.split(' ')
-                    log_level = level_parts[0]
-                    function_line = level_parts[1] if len(level_parts) > 1 else ""
-                    
-                    # Parse function:line
-                    if ':' in function_line:
-                        function, line_str = function_line.rsplit(':', 1)
-                        line_num = int(line_str) if line_str.isdigit() else 0
-                    else:
-                        function = function_line
-                        line_num = 0
-                    
-                    # Apply filters
-                    if level and log_level.lower() != level.lower():
-                        continue
-                    
-                    if search and search.lower() not in message.lower():
-                        continue
-                    
-                    logs.append(AdminSystemLog(
-                        timestamp=timestamp,
-                        level=log_level,
-                        message=message,
-                        module=module,
-                        function=function,
-                        line=line_num
-                    ))
-            except Exception:
+        # Walk the log backwards so entries come out newest first and we can
+        # stop as soon as the requested page is filled
+        for line in _read_lines_reversed(log_file):
+            match = LOG_LINE_PATTERN.match(line.strip())
+            if not match:
                 # Skip malformed log lines
                 continue
+            
+            # Apply filters
+            if level_filter and match['level'] != level_filter:
+                continue
+            
+            if search_filter and search_filter not in match['message'].lower():
+                continue
+            
+            logs.append(AdminSystemLog(
+                timestamp=match['timestamp'],
+                level=match['level'],
+                message=match['message'],
+                module=match['module'],
+                function=match['function'],
+                line=int(match['line'])
+            ))
+            if len(logs) >= skip + limit:
+                break
         
-        # Sort by timestamp (newest first) and apply pagination
-        logs.sort(key=lambda x: x.timestamp, reverse=True)
+        # Lines were read newest first, so only pagination is left
         return logs[skip:skip + limit]
         
     except FileNotFoundError:
@@ -381,6 +405,7 @@ async def toggle_user_status(
     session.add(user)
     session.commit()
     session.refresh(user)
+    invalidate_cached_user(user.email)
     
     return {"message": f"User {user.email} status changed to {'active' if user.is_active else 'inactive'}"}
 
@@ -408,5 +433,7 @@ async def delete_user(
     # Delete associated data (cascade delete should handle this)
     session.delete(user)
     session.commit()
+    invalidate_cached_user(user.email)
+    await asyncio.to_thread(response_cache.invalidate, user_id)
     
     return {"message": f"User {user.email} and all associated data deleted successfully"}
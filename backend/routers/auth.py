@@ -1,18 +1,19 @@
 from datetime import timedelta
 from fastapi import APIRouter, Depends, HTTPException, status, Request
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlmodel import Session, select
-from backend.models.models import User, UserCreate, UserLogin, Token
+from sqlmodel import Session, insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from backend.models.models import User, UserCreate, Token, UserRole
 from backend.models.database import get_session
 from backend.auth.auth import (
     authenticate_user, 
     create_access_token, 
     get_password_hash,
+    any_admin_exists,
     ACCESS_TOKEN_EXPIRE_MINUTES
 )
 from backend.middleware.security import security_middleware
 from backend.utils.logger import app_logger, log_security_event
-from backend.models.models import UserRole
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
 
@@ -46,11 +47,25 @@ async def register(user_data: UserCreate, request: Request, session: Session = D
     sanitized_email = security_middleware.sanitize_input(user_data.email)
     sanitized_full_name = security_middleware.sanitize_input(user_data.full_name) if user_data.full_name else None
     
-    # Check if user already exists
-    statement = select(User).where(User.email == sanitized_email)
-    existing_user = session.exec(statement).first()
+    # Create new user
+    hashed_password = get_password_hash(user_data.password)
+    user = User(
+        email=sanitized_email,
+        hashed_password=hashed_password,
+        full_name=sanitized_full_name
+    )
+    
+    # Let the unique index on User.email reject duplicates: one
+    # INSERT ... ON CONFLICT DO NOTHING RETURNING id replaces the separate
+    # existence check and closes the race between check and insert
+    user_id = session.exec(
+        sqlite_insert(User)
+        .values(**user.model_dump(exclude={"id"}))
+        .on_conflict_do_nothing(index_elements=["email"])
+        .returning(User.id)
+    ).scalar_one_or_none()
     
-    if existing_user:
+    if user_id is None:
         log_security_event(app_logger, "DUPLICATE_REGISTRATION", f"Duplicate registration attempt for: {sanitized_email}")
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -60,20 +75,10 @@ async def register(user_data: UserCreate, request: Request, session: Session = D
             }
         )
     
-    # Create new user
-    hashed_password = get_password_hash(user_data.password)
-    user = User(
-        email=sanitized_email,
-        hashed_password=hashed_password,
-        full_name=sanitized_full_name
-    )
-    
-    session.add(user)
     session.commit()
-    session.refresh(user)
     
-    app_logger.info(f"New user registered: {user.id} ({sanitized_email})")
-    return {"message": "User registered successfully", "user_id": user.id}
+    app_logger.info(f"New user registered: {user_id} ({sanitized_email})")
+    return {"message": "User registered successfully", "user_id": user_id}
 
 @router.post("/token", response_model=Token)
 async def login(form_data: OAuth2PasswordRequestForm = Depends(), request: Request = None, session: Session = Depends(get_session)):
@@ -120,8 +125,7 @@ async def setup_admin_user(
     Setup initial admin user - should only be used once during initial setup
     """
     # Check if any admin already exists
-    existing_admin = session.exec(select(User).where(User.role == UserRole.ADMIN)).first()
-    if existing_admin:
+    if any_admin_exists(session):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Admin user already exists"
@@ -150,9 +154,10 @@ async def setup_admin_user(
         is_active=True
     )
     
-    session.add(admin_user)
+    admin_id = session.exec(
+        insert(User).values(**admin_user.model_dump(exclude={"id"})).returning(User.id)
+    ).scalar_one()
     session.commit()
-    session.refresh(admin_user)
     
-    app_logger.info(f"Admin user created: {admin_user.id} ({admin_data.email})")
-    return {"message": "Admin user created successfully", "admin_id": admin_user.id}
\ No newline at end of file
+    app_logger.info(f"Admin user created: {admin_id} ({admin_data.email})")
+    return {"message": "Admin user created successfully", "admin_id": admin_id}
\ No newline at end of file
@@ -1,16 +1,115 @@
-from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import Response, FileResponse
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Query, Request
+from fastapi.responses import FileResponse, StreamingResponse, Response
 from sqlmodel import Session, select
-from backend.models.models import User, ExportRequest, Export, ExportType
-from backend.models.database import get_session
+from sqlalchemy import bindparam
+from backend.models.models import User, ExportRequest, Export, ExportType, ExportHistoryResponse
+from backend.models.database import get_session, SessionLocal
 from backend.auth.auth import get_current_user
-from backend.services.export_service import ExportService
+from backend.services.export_service import ExportService, get_cached_export, cache_export
+from backend.services.response_cache import response_cache
+from backend.utils.logger import app_logger
+from collections import OrderedDict
+from pathlib import Path
 from datetime import datetime
-import os
+import uuid
+import secrets
 import asyncio
+import aiofiles
+import aiofiles.os
 
 router = APIRouter(prefix="/api/v1/export", tags=["export"])
 
+EXPORTS_DIR = Path("exports")
+EXPORT_CHUNK_SIZE = 64 * 1024
+EXPORT_WRITE_BUFFER_SIZE = 1024 * 1024
+EXPORT_JOBS_MAX_SIZE = 1000
+
+export_service = ExportService()
+
+# Fixed-shape queries built once at import and re-executed with bound parameters
+EXPORT_HISTORY_STATEMENT = select(Export).where(
+    Export.user_id == bindparam("user_id")
+).order_by(Export.created_at.desc()).offset(bindparam("offset")).limit(bindparam("limit"))
+USER_EXPORT_STATEMENT = select(Export).where(
+    Export.id == bindparam("export_id"),
+    Export.user_id == bindparam("user_id")
+)
+
+# Status of background PDF exports keyed by job id; oldest jobs are dropped first.
+# The store lives in this process: jobs are lost on restart and only the worker
+# that accepted a job can report on it, so run a single worker when using jobs.
+_export_jobs: "OrderedDict[str, dict]" = OrderedDict()
+
+async def _iter_file(file_path: str):
+    """Stream a saved export back from disk in fixed-size blocks"""
+    async with aiofiles.open(file_path, 'rb') as f:
+        while True:
+            chunk = await f.read(EXPORT_CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+
+async def _write_pdf_file(file_path: str, pdf_content: bytes) -> None:
+    """Write a PDF through a 1 MiB buffer in buffer-sized slices"""
+    # No fsync: an export can always be regenerated
+    pdf_view = memoryview(pdf_content)
+    async with aiofiles.open(file_path, 'wb', buffering=EXPORT_WRITE_BUFFER_SIZE) as f:
+        for offset in range(0, len(pdf_view), EXPORT_WRITE_BUFFER_SIZE):
+            await f.write(pdf_view[offset:offset + EXPORT_WRITE_BUFFER_SIZE])
+
+def _render_export(service: ExportService, export_type: ExportType, user_id: int, request: ExportRequest):
+    """Render a text or PDF export for the user in a dedicated session"""
+    generated_at = datetime.now()
+    with SessionLocal() as session:
+        # Each section queries its own latest rows, so only the user row is loaded here
+        user = session.get(User, user_id)
+        if export_type == ExportType.PDF:
+            return service.export_to_pdf(
+                user,
+                session,
+                request.include_risk_profile,
+                request.include_portfolio,
+                request.include_scenarios,
+                generated_at
+            )
+        
+        # Only the text body is cached; the header carries this request's time
+        cache_key = (
+            export_type,
+            user_id,
+            request.include_risk_profile,
+            request.include_portfolio,
+            request.include_scenarios,
+            service.get_data_version(session, user_id)
+        )
+        body = get_cached_export(cache_key)
+        if body is None:
+            body = service.text_report_body(
+                user,
+                session,
+                request.include_risk_profile,
+                request.include_portfolio,
+                request.include_scenarios
+            )
+            cache_export(cache_key, body)
+        return service.text_report_header(user, generated_at) + body
+
+def _save_export_record(session: Session, export_record: Export) -> int:
+    """Persist an export record and return its id; run off the event loop via asyncio.to_thread"""
+    return _save_export_records(session, [export_record])[0]
+
+def _save_export_records(session: Session, export_records: list) -> list:
+    """Persist export records in one commit and return their ids; run off the event loop via asyncio.to_thread"""
+    session.add_all(export_records)
+    # Flushing assigns the ids, so there is no need to re-SELECT the rows after commit
+    session.flush()
+    export_ids = [export_record.id for export_record in export_records]
+    user_ids = {export_record.user_id for export_record in export_records}
+    session.commit()
+    for user_id in user_ids:
+        response_cache.invalidate(user_id)
+    return export_ids
+
 @router.post("/text")
 async def export_text(
     request: ExportRequest,
@@ -21,27 +120,20 @@ async def export_text(
     Export user's analysis results as text
     """
     try:
-        service = ExportService()
-        text_content = service.export_to_text(
-            current_user, 
-            session,
-            request.include_risk_profile,
-            request.include_portfolio,
-            request.include_scenarios
-        )
+        text_content = await asyncio.to_thread(_render_export, export_service, ExportType.TEXT, current_user.id, request)
         
         # Create exports directory if it doesn't exist
-        exports_dir = "exports"
-        if not os.path.exists(exports_dir):
-            os.makedirs(exports_dir)
+        await asyncio.to_thread(EXPORTS_DIR.mkdir, parents=True, exist_ok=True)
         
         # Generate filename and save file
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f"investment_analysis_{timestamp}.txt"
-        file_path = os.path.join(exports_dir, filename)
+        # Random suffix: exports landing in the same second can't collide; the
+        # creation time lives on the Export row
+        file_token = secrets.token_hex(6)
+        filename = f"investment_analysis_{file_token}.txt"
+        file_path = str(EXPORTS_DIR / filename)
         
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(text_content)
+        async with aiofiles.open(file_path, 'w', encoding='utf-8', buffering=EXPORT_WRITE_BUFFER_SIZE) as f:
+            await f.write(text_content)
         
         # Save export record to database
         export_record = Export(
@@ -54,12 +146,10 @@ async def export_text(
             include_scenarios=request.include_scenarios
         )
         
-        session.add(export_record)
-        session.commit()
-        session.refresh(export_record)
+        await asyncio.to_thread(_save_export_record, session, export_record)
         
-        return Response(
-            content=text_content,
+        return StreamingResponse(
+            _iter_file(file_path),
             media_type="text/plain",
             headers={"Content-Disposition": f"attachment; filename={filename}"}
         )
@@ -77,50 +167,39 @@ async def export_pdf(
     Export user's analysis results as PDF with timeout protection
     """
     try:
-        print(f"🚀 Starting PDF export for user {current_user.email}")
-        
-        # Create a task for PDF generation with timeout
-        service = ExportService()
+        # Read once up front; committing the export row expires current_user
+        user_email = current_user.email
+        app_logger.info(f"Starting PDF export for user {user_email}")
         
         # Run PDF generation with timeout protection
         try:
             # Use asyncio.wait_for to add timeout protection
             pdf_content = await asyncio.wait_for(
-                asyncio.to_thread(
-                    service.export_to_pdf,
-                    current_user,
-                    session,
-                    request.include_risk_profile,
-                    request.include_portfolio,
-                    request.include_scenarios
-                ),
+                asyncio.to_thread(_render_export, export_service, ExportType.PDF, current_user.id, request),
                 timeout=15.0  # 15 second timeout since charts are disabled (reduced from 25)
             )
             
-            print(f"✅ PDF generation completed for user {current_user.email}")
+            app_logger.info(f"PDF generation completed for user {user_email}")
             
         except asyncio.TimeoutError:
-            print(f"⏰ PDF generation timeout for user {current_user.email}")
+            app_logger.warning(f"PDF generation timeout for user {user_email}")
             raise HTTPException(
                 status_code=408, 
                 detail="PDF generation timed out. The export may be too complex. Please try again or contact support."
             )
         
         # Create exports directory if it doesn't exist
-        exports_dir = "exports"
-        if not os.path.exists(exports_dir):
-            os.makedirs(exports_dir)
+        await asyncio.to_thread(EXPORTS_DIR.mkdir, parents=True, exist_ok=True)
         
         # Generate filename and save file
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f"investment_analysis_{timestamp}.pdf"
-        file_path = os.path.join(exports_dir, filename)
+        file_token = secrets.token_hex(6)
+        filename = f"investment_analysis_{file_token}.pdf"
+        file_path = str(EXPORTS_DIR / filename)
         
         # Save the PDF file
-        with open(file_path, 'wb') as f:
-            f.write(pdf_content)
+        await _write_pdf_file(file_path, pdf_content)
         
-        print(f"💾 PDF file saved: {file_path}")
+        app_logger.debug(f"PDF file saved: {file_path}")
         
         # Save export record to database
         export_record = Export(
@@ -133,14 +212,12 @@ async def export_pdf(
             include_scenarios=request.include_scenarios
         )
         
-        session.add(export_record)
-        session.commit()
-        session.refresh(export_record)
+        await asyncio.to_thread(_save_export_record, session, export_record)
         
-        print(f"📊 Export record saved to database for user {current_user.email}")
+        app_logger.debug(f"Export record saved to database for user {user_email}")
         
-        return Response(
-            content=pdf_content,
+        return StreamingResponse(
+            _iter_file(file_path),
             media_type="application/pdf",
             headers={"Content-Disposition": f"attachment; filename={filename}"}
         )
@@ -149,78 +226,220 @@ async def export_pdf(
         # Re-raise HTTP exceptions (like timeout)
         raise
     except Exception as e:
-        print(f"❌ PDF export error for user {current_user.email}: {str(e)}")
+        app_logger.error(f"PDF export error for user {user_email}: {str(e)}")
         raise HTTPException(
             status_code=500, 
             detail=f"Error generating PDF export: {str(e)}. Please try again or contact support."
         )
 
-@router.get("/history")
-async def get_export_history(
+@router.post("/bundle")
+async def export_bundle(
+    request: ExportRequest,
     current_user: User = Depends(get_current_user),
     session: Session = Depends(get_session)
 ):
     """
-    Get export history for the current user
+    Export user's analysis results as both text and PDF in one request
     """
     try:
-        statement = select(Export).where(
-            Export.user_id == current_user.id
-        ).order_by(Export.created_at.desc())
-        
-        exports = session.exec(statement).all()
-        
-        exports_data = []
-        for export in exports:
-            exports_data.append({
-                "export_id": export.id,
-                "export_type": export.export_type,
-                "filename": export.filename,
-                "include_risk_profile": export.include_risk_profile,
-                "include_portfolio": export.include_portfolio,
-                "include_scenarios": export.include_scenarios,
-                "created_at": export.created_at.isoformat()
-            })
+        # Text and PDF renders run concurrently on separate worker threads
+        try:
+            text_content, pdf_content = await asyncio.wait_for(
+                asyncio.gather(
+                    asyncio.to_thread(_render_export, export_service, ExportType.TEXT, current_user.id, request),
+                    asyncio.to_thread(_render_export, export_service, ExportType.PDF, current_user.id, request)
+                ),
+                timeout=15.0
+            )
+        except asyncio.TimeoutError:
+            raise HTTPException(
+                status_code=408,
+                detail="Export generation timed out. The export may be too complex. Please try again or contact support."
+            )
+        
+        await asyncio.to_thread(EXPORTS_DIR.mkdir, parents=True, exist_ok=True)
+        
+        file_token = secrets.token_hex(6)
+        text_filename = f"investment_analysis_{file_token}.txt"
+        pdf_filename = f"investment_analysis_{file_token}.pdf"
+        text_path = str(EXPORTS_DIR / text_filename)
+        pdf_path = str(EXPORTS_DIR / pdf_filename)
+        
+        async with aiofiles.open(text_path, 'w', encoding='utf-8', buffering=EXPORT_WRITE_BUFFER_SIZE) as f:
+            await f.write(text_content)
+        await _write_pdf_file(pdf_path, pdf_content)
+        
+        # Save both export records in a single transaction
+        bundle_files = (
+            (ExportType.TEXT, text_filename, text_path),
+            (ExportType.PDF, pdf_filename, pdf_path)
+        )
+        export_records = [
+            Export(
+                user_id=current_user.id,
+                export_type=export_type,
+                filename=filename,
+                file_path=file_path,
+                include_risk_profile=request.include_risk_profile,
+                include_portfolio=request.include_portfolio,
+                include_scenarios=request.include_scenarios
+            )
+            for export_type, filename, file_path in bundle_files
+        ]
+        export_ids = await asyncio.to_thread(_save_export_records, session, export_records)
         
         return {
-            "exports": exports_data,
-            "count": len(exports_data)
+            "exports": [
+                {
+                    "export_id": export_id,
+                    "export_type": export_type,
+                    "filename": filename
+                }
+                for export_id, (export_type, filename, _) in zip(export_ids, bundle_files)
+            ]
         }
         
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error generating export bundle: {str(e)}")
+
+async def _run_pdf_export_job(job_id: str, user_id: int, request: ExportRequest):
+    """Generate a PDF export in the background and record the outcome on the job"""
+    job = _export_jobs.get(job_id)
+    if job is None:
+        # Evicted before it started; nobody can poll for it any more
+        return
+    job["status"] = "running"
+    try:
+        pdf_content = await asyncio.to_thread(_render_export, export_service, ExportType.PDF, user_id, request)
+        
+        await asyncio.to_thread(EXPORTS_DIR.mkdir, parents=True, exist_ok=True)
+        
+        file_token = secrets.token_hex(6)
+        filename = f"investment_analysis_{file_token}.pdf"
+        file_path = str(EXPORTS_DIR / filename)
+        await _write_pdf_file(file_path, pdf_content)
+        
+        export_record = Export(
+            user_id=user_id,
+            export_type=ExportType.PDF,
+            filename=filename,
+            file_path=file_path,
+            include_risk_profile=request.include_risk_profile,
+            include_portfolio=request.include_portfolio,
+            include_scenarios=request.include_scenarios
+        )
+        with SessionLocal() as session:
+            export_id = await asyncio.to_thread(_save_export_record, session, export_record)
+        job.update(status="completed", export_id=export_id, filename=filename)
+    except Exception as e:
+        job.update(status="failed", error=str(e))
+
+@router.post("/pdf/jobs", status_code=202)
+async def create_pdf_export_job(
+    request: ExportRequest,
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Queue a PDF export and return immediately with a job id to poll
+    """
+    job_id = uuid.uuid4().hex
+    _export_jobs[job_id] = {"user_id": current_user.id, "status": "queued"}
+    if len(_export_jobs) > EXPORT_JOBS_MAX_SIZE:
+        _export_jobs.popitem(last=False)
+    
+    background_tasks.add_task(_run_pdf_export_job, job_id, current_user.id, request)
+    return {"job_id": job_id, "status": "queued"}
+
+@router.get("/jobs/{job_id}")
+async def get_export_job(
+    job_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get the status of a background export; completed jobs carry the export_id to download
+    """
+    job = _export_jobs.get(job_id)
+    if not job or job["user_id"] != current_user.id:
+        raise HTTPException(status_code=404, detail="Export job not found")
+    
+    return {
+        "job_id": job_id,
+        "status": job["status"],
+        "export_id": job.get("export_id"),
+        "filename": job.get("filename"),
+        "error": job.get("error")
+    }
+
+@router.get("/history", response_model=ExportHistoryResponse)
+async def get_export_history(
+    limit: int = Query(50, ge=1, le=200),
+    offset: int = Query(0, ge=0),
+    current_user: User = Depends(get_current_user),
+    session: Session = Depends(get_session)
+):
+    """
+    Get a page of export history for the current user
+    """
+    try:
+        exports = session.exec(
+            EXPORT_HISTORY_STATEMENT,
+            params={"user_id": current_user.id, "offset": offset, "limit": limit}
+        ).all()
+        
+        return ExportHistoryResponse.model_validate({
+            "exports": exports,
+            "count": len(exports),
+            "limit": limit,
+            "offset": offset
+        })
+        
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching export history: {str(e)}")
 
 @router.get("/download/{export_id}")
 async def download_export(
     export_id: int,
+    http_request: Request,
     current_user: User = Depends(get_current_user),
     session: Session = Depends(get_session)
 ):
     """
-    Download a specific export file
+    Download a specific export file; answers 304 when the client's ETag still matches
     """
     try:
-        statement = select(Export).where(
-            Export.id == export_id,
-            Export.user_id == current_user.id
-        )
-        
-        export = session.exec(statement).first()
+        export = session.exec(
+            USER_EXPORT_STATEMENT, params={"export_id": export_id, "user_id": current_user.id}
+        ).first()
         
         if not export:
             raise HTTPException(status_code=404, detail="Export not found")
         
-        if not os.path.exists(export.file_path):
+        try:
+            file_stat = await aiofiles.os.stat(export.file_path)
+        except FileNotFoundError:
             raise HTTPException(status_code=404, detail="Export file not found")
         
+        etag = f'"{export.id}-{int(file_stat.st_mtime)}-{file_stat.st_size}"'
+        cache_headers = {"ETag": etag, "Cache-Control": "private, max-age=0, must-revalidate"}
+        if http_request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers=cache_headers)
+        
         media_type = "text/plain" if export.export_type == ExportType.TEXT else "application/pdf"
         
+        # Reuse the stat result so FileResponse doesn't stat the file again
         return FileResponse(
             path=export.file_path,
             filename=export.filename,
-            media_type=media_type
+            media_type=media_type,
+            headers=cache_headers,
+            stat_result=file_stat
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error downloading export: {str(e)}")
 
@@ -234,23 +453,20 @@ async def delete_export(
     Delete a specific export record and file
     """
     try:
-        statement = select(Export).where(
-            Export.id == export_id,
-            Export.user_id == current_user.id
-        )
-        
-        export = session.exec(statement).first()
+        export = session.exec(
+            USER_EXPORT_STATEMENT, params={"export_id": export_id, "user_id": current_user.id}
+        ).first()
         
         if not export:
             raise HTTPException(status_code=404, detail="Export not found")
         
         # Delete file if it exists
-        if os.path.exists(export.file_path):
-            os.remove(export.file_path)
+        Path(export.file_path).unlink(missing_ok=True)
         
         # Delete database record
         session.delete(export)
         session.commit()
+        await asyncio.to_thread(response_cache.invalidate, current_user.id)
         
         return {"message": "Export deleted successfully"}
         
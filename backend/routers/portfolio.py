@@ -1,16 +1,24 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import Session, select
+from sqlmodel import Session, select, delete
+from sqlalchemy import bindparam
+from sqlalchemy.orm import selectinload
 from backend.models.models import User, Portfolio, Holding, PortfolioAnalysisRequest
 from backend.models.database import get_session
 from backend.auth.auth import get_current_user
 from backend.services.portfolio_service import PortfolioService
-from pydantic import BaseModel
-from typing import List, Dict, Any
-import json
+from backend.services.response_cache import response_cache
+from typing import Dict, Any
+import asyncio
 
 router = APIRouter(prefix="/api/v1", tags=["portfolio"])
 portfolio_service = PortfolioService()
 
+# Fixed-shape queries built once at import and re-executed with bound parameters
+LATEST_PORTFOLIO_STATEMENT = select(Portfolio).where(
+    Portfolio.user_id == bindparam("user_id")
+).order_by(Portfolio.updated_at.desc()).limit(1)
+LATEST_PORTFOLIO_WITH_HOLDINGS_STATEMENT = LATEST_PORTFOLIO_STATEMENT.options(selectinload(Portfolio.holdings))
+
 @router.post("/analyze-portfolio", response_model=Dict[str, Any])
 async def analyze_portfolio(
     request: PortfolioAnalysisRequest,
@@ -21,8 +29,8 @@ async def analyze_portfolio(
     Analyze user's portfolio from natural language input
     """
     try:
-        service = PortfolioService()
-        result = service.analyze_portfolio(request.portfolio_input, current_user, session)
+        result = portfolio_service.analyze_portfolio(request.portfolio_input, current_user, session)
+        await asyncio.to_thread(response_cache.invalidate, current_user.id)
         
         # Ensure all required fields are present with safe defaults
         if not isinstance(result, dict):
@@ -66,24 +74,17 @@ async def get_latest_portfolio(
     Get the latest portfolio analysis for the current user
     """
     try:
-        # Get the most recent portfolio for the user
-        statement = select(Portfolio).where(
-            Portfolio.user_id == current_user.id
-        ).order_by(Portfolio.updated_at.desc()).limit(1)
-        
-        portfolio = session.exec(statement).first()
+        # Get the most recent portfolio for the user, with its holdings
+        portfolio = session.exec(
+            LATEST_PORTFOLIO_WITH_HOLDINGS_STATEMENT, params={"user_id": current_user.id}
+        ).first()
         
         if not portfolio:
             return {"message": "No portfolio found"}
         
-        # Get holdings for this portfolio
-        holdings_statement = select(Holding).where(Holding.portfolio_id == portfolio.id)
-        holdings = session.exec(holdings_statement).all()
-        
         # Convert holdings to list of dicts
-        holdings_data = []
-        for holding in holdings:
-            holdings_data.append({
+        holdings_data = [
+            {
                 "id": holding.id,
                 "company_name": holding.company_name,
                 "symbol": holding.symbol,
@@ -93,10 +94,12 @@ async def get_latest_portfolio(
                 "sector": holding.sector,
                 "pe_ratio": holding.pe_ratio,
                 "dividend_yield": holding.dividend_yield
-            })
+            }
+            for holding in portfolio.holdings
+        ]
         
-        # Regenerate visualizations from saved holdings data
-        visualizations = portfolio_service.visualize_portfolio(holdings_data)
+        # Serve the charts stored with the portfolio; rows saved without them are rendered per request
+        visualizations = portfolio_service.get_portfolio_visualizations(portfolio, holdings_data)
         
         return {
             "portfolio_id": portfolio.id,
@@ -121,24 +124,18 @@ async def delete_latest_portfolio(
     """
     try:
         # Get the most recent portfolio for the user
-        statement = select(Portfolio).where(
-            Portfolio.user_id == current_user.id
-        ).order_by(Portfolio.updated_at.desc()).limit(1)
-        
-        portfolio = session.exec(statement).first()
+        portfolio = session.exec(LATEST_PORTFOLIO_STATEMENT, params={"user_id": current_user.id}).first()
         
         if not portfolio:
             raise HTTPException(status_code=404, detail="No portfolio found")
         
-        # Delete holdings first (due to foreign key constraint)
-        holdings_statement = select(Holding).where(Holding.portfolio_id == portfolio.id)
-        holdings = session.exec(holdings_statement).all()
-        for holding in holdings:
-            session.delete(holding)
+        # Delete holdings first (due to foreign key constraint) in one statement
+        session.exec(delete(Holding).where(Holding.portfolio_id == portfolio.id))
         
         # Delete portfolio
         session.delete(portfolio)
         session.commit()
+        await asyncio.to_thread(response_cache.invalidate, current_user.id)
         
         return {"message": "Portfolio deleted successfully"}
         
@@ -1,12 +1,21 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlmodel import Session, select
+from sqlalchemy import bindparam
 from backend.models.models import User, RiskProfileRequest, RiskAssessment
 from backend.models.database import get_session
 from backend.auth.auth import get_current_user
 from backend.services.risk_profile_service import RiskProfileService
-import json
+from backend.services.response_cache import response_cache
+from backend.utils import json_utils
+import asyncio
 
 router = APIRouter(prefix="/api/v1", tags=["risk-profile"])
+risk_service = RiskProfileService()
+
+# Fixed-shape query built once at import and re-executed with bound parameters
+LATEST_RISK_ASSESSMENT_STATEMENT = select(RiskAssessment).where(
+    RiskAssessment.user_id == bindparam("user_id")
+).order_by(RiskAssessment.created_at.desc()).limit(1)
 
 @router.post("/risk-profile")
 async def assess_risk_profile(
@@ -18,8 +27,7 @@ async def assess_risk_profile(
     Assess user's risk tolerance based on questionnaire answers
     """
     try:
-        service = RiskProfileService()
-        result = service.assess_risk_tolerance(request.answers)
+        result = risk_service.assess_risk_tolerance(request.answers)
         
         # Save to database
         risk_assessment = RiskAssessment(
@@ -27,15 +35,15 @@ async def assess_risk_profile(
             score=result['score'],
             category=result['category'],
             description=result['description'],
-            recommendations=json.dumps(result['recommendations']),
-            answers=json.dumps(request.answers)
+            recommendations=json_utils.dumps(result['recommendations']),
+            answers=json_utils.dumps(request.answers)
         )
         
         session.add(risk_assessment)
-        session.commit()
-        session.refresh(risk_assessment)
+        session.flush()
         
-        return {
+        # Build the response before committing so the new row isn't re-SELECTed
+        response = {
             "assessment_id": risk_assessment.id,
             "score": result['score'],
             "category": result['category'],
@@ -44,6 +52,10 @@ async def assess_risk_profile(
             "answers": request.answers,
             "created_at": risk_assessment.created_at.isoformat()
         }
+        session.commit()
+        await asyncio.to_thread(response_cache.invalidate, current_user.id)
+        
+        return response
         
     except Exception as e:
         # Check if it's a database schema error
@@ -64,11 +76,7 @@ async def get_latest_risk_profile(
     """
     try:
         # Get the most recent risk assessment for the user
-        statement = select(RiskAssessment).where(
-            RiskAssessment.user_id == current_user.id
-        ).order_by(RiskAssessment.created_at.desc()).limit(1)
-        
-        result = session.exec(statement).first()
+        result = session.exec(LATEST_RISK_ASSESSMENT_STATEMENT, params={"user_id": current_user.id}).first()
         
         if not result:
             return {"message": "No risk assessment found"}
@@ -78,8 +86,8 @@ async def get_latest_risk_profile(
             "score": result.score,
             "category": result.category,
             "description": result.description,
-            "recommendations": json.loads(result.recommendations),
-            "answers": json.loads(result.answers),
+            "recommendations": json_utils.loads(result.recommendations),
+            "answers": json_utils.loads(result.answers),
             "created_at": result.created_at.isoformat()
         }
         
@@ -96,17 +104,14 @@ async def delete_latest_risk_profile(
     """
     try:
         # Get the most recent risk assessment for the user
-        statement = select(RiskAssessment).where(
-            RiskAssessment.user_id == current_user.id
-        ).order_by(RiskAssessment.created_at.desc()).limit(1)
-        
-        result = session.exec(statement).first()
+        result = session.exec(LATEST_RISK_ASSESSMENT_STATEMENT, params={"user_id": current_user.id}).first()
         
         if not result:
             raise HTTPException(status_code=404, detail="No risk assessment found")
         
         session.delete(result)
         session.commit()
+        await asyncio.to_thread(response_cache.invalidate, current_user.id)
         
         return {"message": "Risk assessment deleted successfully"}
         
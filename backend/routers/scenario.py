@@ -1,15 +1,34 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import ORJSONResponse, Response
 from sqlmodel import Session, select
-from backend.models.models import User, ScenarioAnalysisRequest, Scenario
+from sqlalchemy import bindparam
+from backend.models.models import User, ScenarioAnalysisRequest, Scenario, ScenarioListResponse
 from backend.models.database import get_session
 from backend.auth.auth import get_current_user
 from backend.services.scenario_service import ScenarioService
-import json
+from backend.services.response_cache import response_cache
+from functools import lru_cache
+from backend.utils import json_utils
 
-router = APIRouter(prefix="/api/v1", tags=["scenario"])
+router = APIRouter(prefix="/api/v1", tags=["scenario"], default_response_class=ORJSONResponse)
+
+# Fixed-shape queries built once at import and re-executed with bound parameters
+# The listing only serves ScenarioSummary fields, so leave the narrative and JSON columns unread
+SCENARIO_PAGE_STATEMENT = select(Scenario.id, Scenario.scenario_text, Scenario.created_at).where(
+    Scenario.user_id == bindparam("user_id")
+).order_by(Scenario.created_at.desc()).offset(bindparam("offset")).limit(bindparam("limit"))
+USER_SCENARIO_STATEMENT = select(Scenario).where(
+    Scenario.id == bindparam("scenario_id"),
+    Scenario.user_id == bindparam("user_id")
+)
+
+@lru_cache(maxsize=1)
+def get_scenario_service() -> ScenarioService:
+    """Build the Gemini-backed service once, on first use, since it requires GEMINI_API_KEY"""
+    return ScenarioService()
 
 @router.post("/analyze-scenario")
-async def analyze_scenario(
+def analyze_scenario(
     request: ScenarioAnalysisRequest,
     current_user: User = Depends(get_current_user),
     session: Session = Depends(get_session)
@@ -18,8 +37,7 @@ async def analyze_scenario(
     Analyze market scenario impact on user's portfolio with dynamic portfolio-aware analysis
     """
     try:
-        service = ScenarioService()
-        result = service.analyze_scenario(
+        result = get_scenario_service().analyze_scenario(
             request.scenario_text, 
             current_user, 
             session, 
@@ -31,20 +49,20 @@ async def analyze_scenario(
             user_id=current_user.id,
             scenario_text=request.scenario_text,
             analysis_narrative=result['narrative'],
-            insights=json.dumps(result['insights']),
-            recommendations=json.dumps(result['recommendations']),
+            insights=json_utils.dumps(result['insights']),
+            recommendations=json_utils.dumps(result['recommendations']),
             risk_assessment=result['risk_assessment'],
-            risk_details=json.dumps(result.get('risk_details', {})),
-            portfolio_impact=json.dumps(result.get('portfolio_impact', {})),
-            portfolio_composition=json.dumps(result.get('portfolio_composition', {}))
+            risk_details=json_utils.dumps(result.get('risk_details', {})),
+            portfolio_impact=json_utils.dumps(result.get('portfolio_impact', {})),
+            portfolio_composition=json_utils.dumps(result.get('portfolio_composition', {}))
         )
         
         session.add(scenario)
-        session.commit()
-        session.refresh(scenario)
+        session.flush()
         
-        # Return enhanced response with portfolio analysis data
-        return {
+        # Build the enhanced response with portfolio analysis data before
+        # committing, so the new row isn't re-SELECTed afterwards
+        response = {
             "scenario_id": scenario.id,
             "scenario_text": request.scenario_text,
             "narrative": result['narrative'],
@@ -56,57 +74,54 @@ async def analyze_scenario(
             "portfolio_composition": result.get('portfolio_composition', {}),
             "created_at": scenario.created_at.isoformat()
         }
+        session.commit()
+        response_cache.invalidate(current_user.id)
+        
+        return response
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error analyzing scenario: {str(e)}")
 
-@router.get("/scenarios")
-async def get_user_scenarios(
+@router.get("/scenarios", response_model=ScenarioListResponse)
+def get_user_scenarios(
+    limit: int = Query(50, ge=1, le=200),
+    offset: int = Query(0, ge=0),
     current_user: User = Depends(get_current_user),
     session: Session = Depends(get_session)
 ):
     """
-    Get all scenarios for the current user
+    Get a page of scenario summaries for the current user; full analysis is served by GET /scenarios/{id}
     """
     try:
-        statement = select(Scenario).where(
-            Scenario.user_id == current_user.id
-        ).order_by(Scenario.created_at.desc())
-        
-        scenarios = session.exec(statement).all()
-        
-        scenarios_data = []
-        for scenario in scenarios:
-            scenario_data = {
-                "scenario_id": scenario.id,
-                "scenario_text": scenario.scenario_text,
-                "narrative": scenario.analysis_narrative,
-                "insights": json.loads(scenario.insights),
-                "recommendations": json.loads(scenario.recommendations),
-                "risk_assessment": scenario.risk_assessment,
-                "created_at": scenario.created_at.isoformat()
-            }
-            
-            # Add new fields if they exist
-            if scenario.risk_details:
-                scenario_data["risk_details"] = json.loads(scenario.risk_details)
-            if scenario.portfolio_impact:
-                scenario_data["portfolio_impact"] = json.loads(scenario.portfolio_impact)
-            if scenario.portfolio_composition:
-                scenario_data["portfolio_composition"] = json.loads(scenario.portfolio_composition)
-            
-            scenarios_data.append(scenario_data)
-        
-        return {
-            "scenarios": scenarios_data,
-            "count": len(scenarios_data)
-        }
-        
+        cache_name = f"scenarios:{limit}:{offset}"
+        cached, cache_generation = response_cache.get(current_user.id, cache_name)
+        if cached is not None:
+            return Response(content=cached, media_type="application/json")
+        
+        scenarios = session.exec(
+            SCENARIO_PAGE_STATEMENT,
+            params={"user_id": current_user.id, "offset": offset, "limit": limit}
+        ).all()
+        
+        body = ScenarioListResponse.model_validate({
+            "scenarios": scenarios,
+            "count": len(scenarios),
+            "limit": limit,
+            "offset": offset
+        }).model_dump_json().encode()
+        response_cache.set(current_user.id, cache_name, body, cache_generation)
+        
+        return Response(content=body, media_type="application/json")
+        
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching scenarios: {str(e)}")
 
 @router.get("/scenarios/{scenario_id}")
-async def get_scenario(
+def get_scenario(
     scenario_id: int,
     current_user: User = Depends(get_current_user),
     session: Session = Depends(get_session)
@@ -115,12 +130,14 @@ async def get_scenario(
     Get a specific scenario by ID
     """
     try:
-        statement = select(Scenario).where(
-            Scenario.id == scenario_id,
-            Scenario.user_id == current_user.id
-        )
+        cache_name = f"scenario:{scenario_id}"
+        cached, cache_generation = response_cache.get(current_user.id, cache_name)
+        if cached is not None:
+            return Response(content=cached, media_type="application/json")
         
-        scenario = session.exec(statement).first()
+        scenario = session.exec(
+            USER_SCENARIO_STATEMENT, params={"scenario_id": scenario_id, "user_id": current_user.id}
+        ).first()
         
         if not scenario:
             raise HTTPException(status_code=404, detail="Scenario not found")
@@ -129,27 +146,35 @@ async def get_scenario(
             "scenario_id": scenario.id,
             "scenario_text": scenario.scenario_text,
             "narrative": scenario.analysis_narrative,
-            "insights": json.loads(scenario.insights),
-            "recommendations": json.loads(scenario.recommendations),
             "risk_assessment": scenario.risk_assessment,
             "created_at": scenario.created_at.isoformat()
         }
+        # Stored JSON columns go into the body as-is instead of being re-parsed
+        raw_fields = {
+            "insights": json_utils.raw_column(scenario.insights, b"[]"),
+            "recommendations": json_utils.raw_column(scenario.recommendations, b"[]")
+        }
         
         # Add new fields if they exist
         if scenario.risk_details:
-            scenario_data["risk_details"] = json.loads(scenario.risk_details)
+            raw_fields["risk_details"] = json_utils.raw_column(scenario.risk_details)
         if scenario.portfolio_impact:
-            scenario_data["portfolio_impact"] = json.loads(scenario.portfolio_impact)
+            raw_fields["portfolio_impact"] = json_utils.raw_column(scenario.portfolio_impact)
         if scenario.portfolio_composition:
-            scenario_data["portfolio_composition"] = json.loads(scenario.portfolio_composition)
+            raw_fields["portfolio_composition"] = json_utils.raw_column(scenario.portfolio_composition)
         
-        return scenario_data
+        body = json_utils.dumps_with_raw(scenario_data, raw_fields)
+        response_cache.set(current_user.id, cache_name, body, cache_generation)
         
+        return Response(content=body, media_type="application/json")
+        
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching scenario: {str(e)}")
 
 @router.delete("/scenarios/{scenario_id}")
-async def delete_scenario(
+def delete_scenario(
     scenario_id: int,
     current_user: User = Depends(get_current_user),
     session: Session = Depends(get_session)
@@ -158,20 +183,20 @@ async def delete_scenario(
     Delete a specific scenario by ID
     """
     try:
-        statement = select(Scenario).where(
-            Scenario.id == scenario_id,
-            Scenario.user_id == current_user.id
-        )
-        
-        scenario = session.exec(statement).first()
+        scenario = session.exec(
+            USER_SCENARIO_STATEMENT, params={"scenario_id": scenario_id, "user_id": current_user.id}
+        ).first()
         
         if not scenario:
             raise HTTPException(status_code=404, detail="Scenario not found")
         
         session.delete(scenario)
         session.commit()
+        response_cache.invalidate(current_user.id)
         
         return {"message": "Scenario deleted successfully"}
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error deleting scenario: {str(e)}")
\ No newline at end of file
@@ -1,127 +1,135 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import Session, select
-from backend.models.models import User, RiskAssessment, Portfolio, Holding, Scenario, Export
-from backend.models.database import get_session
+from fastapi.responses import ORJSONResponse, Response
+from sqlmodel import select
+from sqlalchemy import bindparam
+from sqlalchemy.orm import joinedload
+from backend.models.models import User, RiskAssessment, Portfolio, Scenario, Export
+from backend.models.database import SessionLocal
 from backend.auth.auth import get_current_user
 from backend.services.portfolio_service import PortfolioService
-import json
+from backend.services.response_cache import response_cache
+from backend.utils import json_utils
+from typing import Optional, Dict, Any, List
+import asyncio
 
-router = APIRouter(prefix="/api/v1/user", tags=["user-data"])
+router = APIRouter(prefix="/api/v1/user", tags=["user-data"], default_response_class=ORJSONResponse)
 portfolio_service = PortfolioService()
 
-@router.get("/data")
-async def get_user_data(
-    current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
-):
-    """
-    Get all user data including risk profile, portfolio, scenarios, and exports
-    """
+LATEST_RISK_ASSESSMENT_STATEMENT = select(RiskAssessment).where(
+    RiskAssessment.user_id == bindparam("user_id")
+).order_by(RiskAssessment.created_at.desc()).limit(1)
+# Latest portfolio and its holdings in a single round trip
+LATEST_PORTFOLIO_WITH_HOLDINGS_STATEMENT = select(Portfolio).where(
+    Portfolio.user_id == bindparam("user_id")
+).order_by(Portfolio.updated_at.desc()).limit(1).options(joinedload(Portfolio.holdings))
+USER_SCENARIOS_STATEMENT = select(Scenario).where(
+    Scenario.user_id == bindparam("user_id")
+).order_by(Scenario.created_at.desc())
+USER_EXPORTS_STATEMENT = select(Export).where(
+    Export.user_id == bindparam("user_id")
+).order_by(Export.created_at.desc())
+
+# Each section reads through its own session so the four can run concurrently
+# on worker threads; a Session must not be shared between threads
+
+def _fetch_risk_profile(user_id: int) -> Optional[Dict[str, Any]]:
+    """Latest risk assessment as a response dict"""
     try:
-        user_data = {
-            "risk_profile": None,
-            "portfolio": None,
-            "scenarios": [],
-            "exports": []
-        }
-        
-        # Get latest risk assessment
-        try:
-            risk_statement = select(RiskAssessment).where(
-                RiskAssessment.user_id == current_user.id
-            ).order_by(RiskAssessment.created_at.desc()).limit(1)
+        with SessionLocal() as session:
+            risk_assessment = session.exec(LATEST_RISK_ASSESSMENT_STATEMENT, params={"user_id": user_id}).first()
+            if not risk_assessment:
+                return None
             
-            risk_assessment = session.exec(risk_statement).first()
-            if risk_assessment:
-                # Handle missing answers column gracefully
-                try:
-                    answers = json.loads(risk_assessment.answers) if hasattr(risk_assessment, 'answers') else []
-                except (AttributeError, json.JSONDecodeError):
-                    answers = []
-                
-                user_data["risk_profile"] = {
-                    "assessment_id": risk_assessment.id,
-                    "score": risk_assessment.score,
-                    "category": risk_assessment.category,
-                    "description": risk_assessment.description,
-                    "recommendations": json.loads(risk_assessment.recommendations),
-                    "answers": answers,
-                    "created_at": risk_assessment.created_at.isoformat()
-                }
-        except Exception as e:
-            print(f"Warning: Could not fetch risk assessment: {e}")
-        
-        # Get latest portfolio
-        try:
-            portfolio_statement = select(Portfolio).where(
-                Portfolio.user_id == current_user.id
-            ).order_by(Portfolio.updated_at.desc()).limit(1)
+            # Handle missing answers column gracefully
+            try:
+                answers = json_utils.loads(risk_assessment.answers) if hasattr(risk_assessment, 'answers') else []
+            except (AttributeError, json_utils.JSONDecodeError):
+                answers = []
             
-            portfolio = session.exec(portfolio_statement).first()
-            if portfolio:
-                # Get holdings for this portfolio
-                holdings_statement = select(Holding).where(Holding.portfolio_id == portfolio.id)
-                holdings = session.exec(holdings_statement).all()
-                
-                holdings_data = []
-                for holding in holdings:
-                    holdings_data.append({
-                        "id": holding.id,
-                        "company_name": holding.company_name,
-                        "symbol": holding.symbol,
-                        "quantity": holding.quantity,
-                        "current_price": holding.current_price,
-                        "total_value": holding.total_value,
-                        "sector": holding.sector,
-                        "pe_ratio": holding.pe_ratio,
-                        "dividend_yield": holding.dividend_yield
-                    })
-                
-                user_data["portfolio"] = {
-                    "portfolio_id": portfolio.id,
-                    "total_value": portfolio.total_value,
-                    "holdings": holdings_data,
-                    "holdings_count": len(holdings_data),
-                    "visualizations": portfolio_service.visualize_portfolio(holdings_data),
-                    "created_at": portfolio.created_at.isoformat(),
-                    "updated_at": portfolio.updated_at.isoformat()
-                }
-        except Exception as e:
-            print(f"Warning: Could not fetch portfolio: {e}")
-        
-        # Get all scenarios
-        try:
-            scenarios_statement = select(Scenario).where(
-                Scenario.user_id == current_user.id
-            ).order_by(Scenario.created_at.desc())
+            return {
+                "assessment_id": risk_assessment.id,
+                "score": risk_assessment.score,
+                "category": risk_assessment.category,
+                "description": risk_assessment.description,
+                "recommendations": json_utils.loads(risk_assessment.recommendations),
+                "answers": answers,
+                "created_at": risk_assessment.created_at.isoformat()
+            }
+    except Exception as e:
+        print(f"Warning: Could not fetch risk assessment: {e}")
+        return None
+
+def _fetch_portfolio(user_id: int) -> Optional[Dict[str, Any]]:
+    """Latest portfolio with its holdings and charts as a response dict"""
+    try:
+        with SessionLocal() as session:
+            portfolio = session.exec(
+                LATEST_PORTFOLIO_WITH_HOLDINGS_STATEMENT, params={"user_id": user_id}
+            ).unique().first()
+            if not portfolio:
+                return None
             
-            scenarios = session.exec(scenarios_statement).all()
-            for scenario in scenarios:
-                user_data["scenarios"].append({
+            holdings_data = []
+            for holding in portfolio.holdings:
+                holdings_data.append({
+                    "id": holding.id,
+                    "company_name": holding.company_name,
+                    "symbol": holding.symbol,
+                    "quantity": holding.quantity,
+                    "current_price": holding.current_price,
+                    "total_value": holding.total_value,
+                    "sector": holding.sector,
+                    "pe_ratio": holding.pe_ratio,
+                    "dividend_yield": holding.dividend_yield
+                })
+            visualizations = portfolio_service.get_portfolio_visualizations(portfolio, holdings_data)
+            
+            return {
+                "portfolio_id": portfolio.id,
+                "total_value": portfolio.total_value,
+                "holdings": holdings_data,
+                "holdings_count": len(holdings_data),
+                "visualizations": visualizations,
+                "created_at": portfolio.created_at.isoformat(),
+                "updated_at": portfolio.updated_at.isoformat()
+            }
+    except Exception as e:
+        print(f"Warning: Could not fetch portfolio: {e}")
+        return None
+
+def _fetch_scenario_rows(user_id: int) -> List[bytes]:
+    """All scenarios as encoded JSON objects, with the stored JSON columns spliced in as-is"""
+    try:
+        with SessionLocal() as session:
+            scenarios = session.exec(USER_SCENARIOS_STATEMENT, params={"user_id": user_id}).all()
+            return [
+                json_utils.dumps_with_raw({
                     "scenario_id": scenario.id,
                     "scenario_text": scenario.scenario_text,
                     "narrative": scenario.analysis_narrative,
-                    "insights": json.loads(scenario.insights),
-                    "recommendations": json.loads(scenario.recommendations),
                     "risk_assessment": scenario.risk_assessment,
-                    "created_at": scenario.created_at.isoformat(),
+                    "created_at": scenario.created_at.isoformat()
+                }, {
+                    "insights": json_utils.raw_column(scenario.insights, b"[]"),
+                    "recommendations": json_utils.raw_column(scenario.recommendations, b"[]"),
                     # Add the enhanced fields that are being saved
-                    "risk_details": json.loads(scenario.risk_details) if scenario.risk_details else {},
-                    "portfolio_impact": json.loads(scenario.portfolio_impact) if scenario.portfolio_impact else {},
-                    "portfolio_composition": json.loads(scenario.portfolio_composition) if scenario.portfolio_composition else {}
+                    "risk_details": json_utils.raw_column(scenario.risk_details),
+                    "portfolio_impact": json_utils.raw_column(scenario.portfolio_impact),
+                    "portfolio_composition": json_utils.raw_column(scenario.portfolio_composition)
                 })
-        except Exception as e:
-            print(f"Warning: Could not fetch scenarios: {e}")
-        
-        # Get all exports
-        try:
-            exports_statement = select(Export).where(
-                Export.user_id == current_user.id
-            ).order_by(Export.created_at.desc())
-            
-            exports = session.exec(exports_statement).all()
-            for export in exports:
-                user_data["exports"].append({
+                for scenario in scenarios
+            ]
+    except Exception as e:
+        print(f"Warning: Could not fetch scenarios: {e}")
+        return []
+
+def _fetch_exports(user_id: int) -> List[Dict[str, Any]]:
+    """All export records as response dicts"""
+    try:
+        with SessionLocal() as session:
+            exports = session.exec(USER_EXPORTS_STATEMENT, params={"user_id": user_id}).all()
+            return [
+                {
                     "export_id": export.id,
                     "export_type": export.export_type,
                     "filename": export.filename,
@@ -129,11 +137,43 @@ async def get_user_data(
                     "include_portfolio": export.include_portfolio,
                     "include_scenarios": export.include_scenarios,
                     "created_at": export.created_at.isoformat()
-                })
-        except Exception as e:
-            print(f"Warning: Could not fetch exports: {e}")
+                }
+                for export in exports
+            ]
+    except Exception as e:
+        print(f"Warning: Could not fetch exports: {e}")
+        return []
+
+@router.get("/data")
+async def get_user_data(
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get all user data including risk profile, portfolio, scenarios, and exports
+    """
+    try:
+        user_id = current_user.id
+        cached, cache_generation = await asyncio.to_thread(response_cache.get, user_id, "user_data")
+        if cached is not None:
+            return Response(content=cached, media_type="application/json")
+        
+        risk_profile, portfolio, scenario_rows, exports = await asyncio.gather(
+            asyncio.to_thread(_fetch_risk_profile, user_id),
+            asyncio.to_thread(_fetch_portfolio, user_id),
+            asyncio.to_thread(_fetch_scenario_rows, user_id),
+            asyncio.to_thread(_fetch_exports, user_id)
+        )
+        user_data = {
+            "risk_profile": risk_profile,
+            "portfolio": portfolio,
+            "exports": exports
+        }
         
-        return user_data
+        body = json_utils.dumps_with_raw(user_data, {"scenarios": b"[" + b",".join(scenario_rows) + b"]"})
+        await asyncio.to_thread(response_cache.set, user_id, "user_data", body, cache_generation)
+        return Response(content=body, media_type="application/json")
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching user data: {str(e)}")
@@ -1,11 +1,22 @@
-from typing import Optional, List
+from typing import Optional, List, Tuple
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass
+from functools import lru_cache
+from operator import attrgetter
 from datetime import datetime
-from sqlmodel import Session, select
+from sqlmodel import Session, select, func
+from sqlalchemy import bindparam
+from sqlalchemy.orm import joinedload
 from backend.models.models import User, Portfolio, Holding, RiskAssessment, Scenario
-import json
+from backend.utils import json_utils
+from backend.utils.logger import app_logger
 import io
+import os
 import time
 import re
+import threading
+import heapq
+from xml.sax.saxutils import escape
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import A4
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
@@ -18,1007 +29,1039 @@ from reportlab.graphics.charts.legends import Legend
 from reportlab.lib.enums import TA_LEFT, TA_CENTER, TA_RIGHT
 import math
 
+EXPORT_CACHE_TTL_SECONDS = int(os.getenv("EXPORT_CACHE_TTL_SECONDS", "3600"))
+EXPORT_CACHE_MAX_SIZE = 64
+
+# Deflating page streams costs ~15% of build time but shrinks a report to less
+# than half its size. Short reports skip it; long ones are compressed so stored
+# exports and downloads stay small. invariant=1 drops the PDF creation date and
+# random document ID from the file metadata.
+PDF_COMPRESS_MIN_FLOWABLES = int(os.getenv("PDF_COMPRESS_MIN_FLOWABLES", "80"))
+
+# Rendered text report bodies keyed by (renderer, user_id, include_* flags, data
+# version). The data version changes whenever a source row is added or removed,
+# so stale entries are never served and simply age out. The "Generated on"
+# header is stamped per request on top of the cached body.
+_export_cache: "OrderedDict[tuple, Tuple[float, object]]" = OrderedDict()
+_export_cache_lock = threading.Lock()
+
+def get_cached_export(key: tuple):
+    with _export_cache_lock:
+        entry = _export_cache.get(key)
+        if entry is None:
+            return None
+        expires_at, content = entry
+        if expires_at < time.monotonic():
+            _export_cache.pop(key, None)
+            return None
+        _export_cache.move_to_end(key)
+        return content
+
+def cache_export(key: tuple, content) -> None:
+    with _export_cache_lock:
+        _export_cache[key] = (time.monotonic() + EXPORT_CACHE_TTL_SECONDS, content)
+        _export_cache.move_to_end(key)
+        if len(_export_cache) > EXPORT_CACHE_MAX_SIZE:
+            _export_cache.popitem(last=False)
+
+# Markdown emphasis/heading markers and HTML tags stripped from AI-written text
+_MARKDOWN_RE = re.compile(r'###|\*+')
+_HTML_TAG_RE = re.compile(r'<[^>]*>')
+
+def _strip_markdown(text: str) -> str:
+    """Drop ### and * markers in one pass; same result as the chained str.replace calls"""
+    return _MARKDOWN_RE.sub('', text)
+
+def _para_text(value) -> str:
+    """Escape stored or user-supplied text for a Paragraph, whose markup parser
+    would otherwise drop <...> runs or raise on them and force a fallback render"""
+    return escape(str(value))
+
+@lru_cache(maxsize=256)
+def _pretty_key(key: str) -> str:
+    """Title-case a JSON field name for display, e.g. overall_risk_score -> Overall Risk Score"""
+    return key.replace('_', ' ').title()
+
+def _cell_text(value, spec: str, suffix: str = '') -> str:
+    """Table cell for a JSON value: numbers formatted with spec plus suffix, anything else via str()"""
+    return f"{value:{spec}}{suffix}" if isinstance(value, (int, float)) else str(value)
+
+def _load_json_object(text: Optional[str]) -> dict:
+    """Parse a JSON object column; missing, malformed or non-object values give {}"""
+    if not text:
+        return {}
+    try:
+        value = json_utils.loads(text)
+    except (ValueError, TypeError):
+        return {}
+    return value if isinstance(value, dict) else {}
+
+def _load_json_list(text: Optional[str]) -> list:
+    """Parse a JSON array column; missing, malformed or non-array values give []"""
+    if not text:
+        return []
+    try:
+        value = json_utils.loads(text)
+    except (ValueError, TypeError):
+        return []
+    return value if isinstance(value, list) else []
+
+# Chart drawings keyed by the values they plot, so re-exporting an unchanged
+# portfolio skips rebuilding them. Callers get a copy of the cached Drawing.
+@lru_cache(maxsize=128)
+def _build_sector_pie_chart(sector_totals: Tuple[Tuple[str, float], ...]) -> Drawing:
+    drawing = Drawing(250, 150)  # Smaller size for speed
+    pie = Pie()
+    pie.x = 125
+    pie.y = 75
+    pie.width = 100
+    pie.height = 100
+    
+    # Prepare data
+    sectors = [sector for sector, _ in sector_totals]
+    values = [value for _, value in sector_totals]
+    
+    pie.data = values
+    pie.labels = sectors
+    pie.slices.strokeWidth = 0.5
+    
+    # Add basic colors; pie.slices creates entries on demand, so index it per value
+    colors_list = [colors.blue, colors.green, colors.red, colors.orange, colors.purple]
+    for i in range(len(values)):
+        pie.slices[i].fillColor = colors_list[i % len(colors_list)]
+    
+    drawing.add(pie)
+    
+    # Simple legend for speed
+    legend = Legend()
+    legend.x = 200
+    legend.y = 25
+    legend.alignment = 'right'
+    legend.fontName = 'Helvetica'
+    legend.fontSize = 7
+    legend.colorNamePairs = [(colors_list[i % len(colors_list)], sectors[i]) for i in range(len(sectors))]
+    drawing.add(legend)
+    
+    return drawing
+
+@lru_cache(maxsize=128)
+def _build_holdings_bar_chart(bars: Tuple[Tuple[str, float], ...]) -> Drawing:
+    drawing = Drawing(300, 150)  # Smaller size for speed
+    chart = VerticalBarChart()
+    chart.x = 50
+    chart.y = 25
+    chart.width = 200
+    chart.height = 100
+    
+    # Prepare data
+    symbols = [symbol for symbol, _ in bars]
+    values = [value for _, value in bars]
+    
+    chart.data = [values]
+    chart.categoryAxis.categoryNames = symbols
+    chart.valueAxis.valueMin = 0
+    chart.valueAxis.valueMax = max(values) * 1.1
+    
+    # Basic styling for speed
+    chart.bars[0].fillColor = colors.blue
+    chart.bars[0].strokeColor = colors.black
+    chart.bars[0].strokeWidth = 0.5
+    
+    drawing.add(chart)
+    return drawing
+
+@dataclass(slots=True)
+class HoldingView:
+    """Display strings for one holding, formatted once per session and shared by the renderers"""
+    company_name: str
+    symbol: str
+    quantity: str
+    price: str
+    price_2dp: str
+    value_2dp: str
+    value_0dp: str
+    sector: str
+
+    def truncated_name(self, width: int) -> str:
+        """Company name cut to fit a table column of width characters"""
+        if len(self.company_name) <= width:
+            return self.company_name
+        return self.company_name[:width - 3] + "..."
+
+# Per-section lookups, ordered and limited in SQL so only the rows an export prints are loaded
+LATEST_RISK_ASSESSMENT_STATEMENT = select(RiskAssessment).where(
+    RiskAssessment.user_id == bindparam("user_id")
+).order_by(RiskAssessment.created_at.desc()).limit(1)
+# Holdings are joined in, since every renderer that shows a portfolio lists them
+LATEST_PORTFOLIO_STATEMENT = select(Portfolio).where(
+    Portfolio.user_id == bindparam("user_id")
+).order_by(Portfolio.created_at.desc()).limit(1).options(joinedload(Portfolio.holdings))
+LATEST_SCENARIOS_STATEMENT = select(Scenario).where(
+    Scenario.user_id == bindparam("user_id")
+).order_by(Scenario.created_at.desc()).limit(bindparam("limit"))
+
+# ReportLab styles are read-only once built, so build them once at import and share them across renders
+SAMPLE_STYLES = getSampleStyleSheet()
+
+SIMPLE_TITLE_STYLE = ParagraphStyle(
+    'SimpleTitle',
+    parent=SAMPLE_STYLES['Heading1'],
+    fontSize=16,
+    spaceAfter=20,
+    alignment=TA_CENTER,
+    fontName='Helvetica-Bold'
+)
+
+SIMPLE_HEADING_STYLE = ParagraphStyle(
+    'SimpleHeading',
+    parent=SAMPLE_STYLES['Heading2'],
+    fontSize=14,
+    spaceAfter=12,
+    fontName='Helvetica-Bold'
+)
+
+FAST_TITLE_STYLE = ParagraphStyle(
+    'FastTitle',
+    parent=SAMPLE_STYLES['Heading1'],
+    fontSize=16,
+    spaceAfter=15,
+    alignment=TA_CENTER,
+    fontName='Helvetica-Bold'
+)
+
+FAST_HEADING_STYLE = ParagraphStyle(
+    'FastHeading',
+    parent=SAMPLE_STYLES['Heading2'],
+    fontSize=12,
+    spaceAfter=10,
+    fontName='Helvetica-Bold'
+)
+
+# Title style with better formatting
+TITLE_STYLE = ParagraphStyle(
+    'CustomTitle',
+    parent=SAMPLE_STYLES['Heading1'],
+    fontSize=18,
+    spaceAfter=20,
+    alignment=TA_CENTER,
+    fontName='Helvetica-Bold',
+    textColor=colors.darkblue
+)
+
+# Section heading style
+HEADING_STYLE = ParagraphStyle(
+    'CustomHeading',
+    parent=SAMPLE_STYLES['Heading2'],
+    fontSize=14,
+    spaceAfter=15,
+    spaceBefore=20,
+    fontName='Helvetica-Bold',
+    textColor=colors.darkblue,
+    borderWidth=1,
+    borderColor=colors.lightgrey,
+    borderPadding=5,
+    backColor=colors.lightgrey
+)
+
+# Subheading style
+SUBHEADING_STYLE = ParagraphStyle(
+    'CustomSubheading',
+    parent=SAMPLE_STYLES['Heading3'],
+    fontSize=12,
+    spaceAfter=10,
+    spaceBefore=15,
+    fontName='Helvetica-Bold',
+    textColor=colors.darkblue
+)
+
+# Normal text style with better spacing
+NORMAL_STYLE = ParagraphStyle(
+    'CustomNormal',
+    parent=SAMPLE_STYLES['Normal'],
+    fontSize=10,
+    spaceAfter=6,
+    fontName='Helvetica',
+    alignment=TA_LEFT,
+    leading=14
+)
+
+# Page header and footer style
+HEADER_FOOTER_STYLE = ParagraphStyle(
+    'HeaderFooter',
+    parent=SAMPLE_STYLES['Normal'],
+    fontSize=8,
+    textColor=colors.grey,
+    alignment=TA_CENTER,
+    spaceAfter=0,
+    spaceBefore=0
+)
+
+# Column widths shared by every report; tuples so a Table can't mutate them
+SIMPLE_RISK_TABLE_COL_WIDTHS = (1.5*inch, 4.5*inch)
+SIMPLE_HOLDINGS_TABLE_COL_WIDTHS = (2.5*inch, 0.8*inch, 0.7*inch, 1.2*inch, 1.0*inch)
+FAST_HOLDINGS_TABLE_COL_WIDTHS = (2.5*inch, 1.0*inch, 0.8*inch, 1.1*inch, 1.1*inch)
+RISK_TABLE_COL_WIDTHS = (1.2*inch, 4.8*inch)
+HOLDINGS_TABLE_COL_WIDTHS = (2.2*inch, 0.8*inch, 0.7*inch, 1.0*inch, 1.2*inch, 1.1*inch)
+DETAIL_TABLE_COL_WIDTHS = (2.5*inch, 2.5*inch)
+SECTORS_TABLE_COL_WIDTHS = (1.5*inch, 1.0*inch, 1.5*inch, 1.0*inch)
+COMPOSITION_TABLE_COL_WIDTHS = (2.0*inch, 3.0*inch)
+
+SIMPLE_RISK_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (0, -1), colors.lightgrey),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black),
+    ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 10),
+])
+
+SIMPLE_HOLDINGS_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 9),
+])
+
+RISK_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (0, -1), colors.lightgrey),
+    ('BACKGROUND', (1, 0), (1, -1), colors.white),
+    ('TEXTCOLOR', (0, 0), (0, -1), colors.darkblue),
+    ('TEXTCOLOR', (1, 0), (1, -1), colors.black),
+    ('ALIGN', (0, 0), (0, -1), 'LEFT'),
+    ('ALIGN', (1, 0), (1, -1), 'LEFT'),
+    ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+    ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 0), (-1, -1), 10),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+    ('TOPPADDING', (0, 0), (-1, -1), 8),
+    ('GRID', (0, 0), (-1, -1), 1, colors.lightgrey),
+    ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+    ('WORDWRAP', (0, 0), (-1, -1), True),
+    ('LEFTPADDING', (0, 0), (-1, -1), 6),  # Add left padding for better text spacing
+    ('RIGHTPADDING', (0, 0), (-1, -1), 6),  # Add right padding for better text spacing
+    ('ROWBACKGROUNDS', (0, 0), (-1, -1), [colors.lightgrey, colors.white]),  # Better row highlighting
+])
+
+HOLDINGS_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+    ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+    ('ALIGN', (0, 1), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 0), (-1, -1), 9),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+    ('TOPPADDING', (0, 0), (-1, -1), 6),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.white),
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.lightgrey),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('WORDWRAP', (0, 0), (-1, -1), True),
+    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey]),
+])
+
+DETAIL_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 0), (-1, -1), 9),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+    ('TOPPADDING', (0, 0), (-1, -1), 6),
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.lightgrey),
+    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey]),
+])
+
+SECTORS_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 0), (-1, -1), 8),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
+    ('TOPPADDING', (0, 0), (-1, -1), 4),
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.lightgrey),
+    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey]),
+])
+
+# Header for each HoldingView field a holdings table can show; the company name always comes first
+HOLDINGS_COLUMN_HEADERS = {
+    'symbol': 'Symbol',
+    'quantity': 'Quantity',
+    'price_2dp': 'Price (₹)',
+    'value_0dp': 'Value (₹)',
+    'sector': 'Sector',
+}
+
+@dataclass(frozen=True)
+class RenderProfile:
+    """Styles, spacing and density of one PDF layout; ExportService._build_story reads them from here"""
+    name: str
+    title_style: ParagraphStyle
+    heading_style: ParagraphStyle
+    subheading_style: ParagraphStyle
+    label_style: ParagraphStyle
+    normal_style: ParagraphStyle
+    section_gap: int
+    block_gap: int
+    scenario_gap: int
+    scenarios_limit: int
+    scenario_title: str
+    # None lists the risk summary as paragraphs instead of a table
+    risk_table_col_widths: Optional[Tuple[float, ...]]
+    risk_table_style: Optional[TableStyle]
+    holdings_fields: Tuple[str, ...]
+    holdings_name_width: int
+    holdings_table_col_widths: Tuple[float, ...]
+    holdings_table_style: TableStyle
+    holdings_caption: Optional[str]
+    # Page banner, sector summary and the per-scenario insights and detail tables
+    detailed: bool
+    include_charts: bool
+    # Layout to retry with if this one fails; the text report is the last resort
+    fallback: Optional['RenderProfile'] = None
+
+SIMPLE_PDF_PROFILE = RenderProfile(
+    name='simple',
+    title_style=SIMPLE_TITLE_STYLE,
+    heading_style=SIMPLE_HEADING_STYLE,
+    subheading_style=SIMPLE_HEADING_STYLE,
+    label_style=SAMPLE_STYLES['Normal'],
+    normal_style=SAMPLE_STYLES['Normal'],
+    section_gap=20,
+    block_gap=15,
+    scenario_gap=10,
+    scenarios_limit=2,
+    scenario_title="Scenario {}:",
+    risk_table_col_widths=SIMPLE_RISK_TABLE_COL_WIDTHS,
+    risk_table_style=SIMPLE_RISK_TABLE_STYLE,
+    holdings_fields=('symbol', 'quantity', 'value_0dp', 'sector'),
+    holdings_name_width=20,
+    holdings_table_col_widths=SIMPLE_HOLDINGS_TABLE_COL_WIDTHS,
+    holdings_table_style=SIMPLE_HOLDINGS_TABLE_STYLE,
+    holdings_caption=None,
+    detailed=False,
+    include_charts=False,
+)
+
+FAST_PDF_PROFILE = RenderProfile(
+    name='fast',
+    title_style=FAST_TITLE_STYLE,
+    heading_style=FAST_HEADING_STYLE,
+    subheading_style=FAST_HEADING_STYLE,
+    label_style=SAMPLE_STYLES['Normal'],
+    normal_style=SAMPLE_STYLES['Normal'],
+    section_gap=15,
+    block_gap=10,
+    scenario_gap=8,
+    scenarios_limit=1,
+    scenario_title="Scenario {}:",
+    risk_table_col_widths=None,
+    risk_table_style=None,
+    holdings_fields=('symbol', 'quantity', 'price_2dp', 'value_0dp'),
+    holdings_name_width=30,
+    holdings_table_col_widths=FAST_HOLDINGS_TABLE_COL_WIDTHS,
+    holdings_table_style=SIMPLE_HOLDINGS_TABLE_STYLE,
+    holdings_caption="Holdings:",
+    detailed=False,
+    include_charts=False,
+)
+
+# Charts stay off: building them dominated render time for little value in the report
+STANDARD_PDF_PROFILE = RenderProfile(
+    name='standard',
+    title_style=TITLE_STYLE,
+    heading_style=HEADING_STYLE,
+    subheading_style=SUBHEADING_STYLE,
+    label_style=SUBHEADING_STYLE,
+    normal_style=NORMAL_STYLE,
+    section_gap=25,
+    block_gap=15,
+    scenario_gap=15,
+    scenarios_limit=2,
+    scenario_title="Scenario Analysis {}",
+    risk_table_col_widths=RISK_TABLE_COL_WIDTHS,
+    risk_table_style=RISK_TABLE_STYLE,
+    holdings_fields=('symbol', 'quantity', 'price_2dp', 'value_0dp', 'sector'),
+    holdings_name_width=25,
+    holdings_table_col_widths=HOLDINGS_TABLE_COL_WIDTHS,
+    holdings_table_style=HOLDINGS_TABLE_STYLE,
+    holdings_caption=None,
+    detailed=True,
+    include_charts=False,
+    fallback=SIMPLE_PDF_PROFILE,
+)
+
 class ExportService:
-    def __init__(self):
-        self.chart_timeout = 3   # 3 seconds timeout for chart generation (much faster)
-        self.pdf_timeout = 20    # 20 seconds timeout for PDF generation (reduced)
+    def get_data_version(self, session: Session, user_id: int) -> tuple:
+        """
+        Fingerprint of everything an export reads, fetched in a single query
+        """
+        def fingerprint(model, *columns):
+            return [
+                select(column).where(model.user_id == user_id).scalar_subquery()
+                for column in (func.count(model.id), func.max(model.id), *columns)
+            ]
+        
+        statement = select(
+            User.full_name,
+            User.email,
+            *fingerprint(RiskAssessment, func.max(RiskAssessment.created_at)),
+            *fingerprint(Portfolio, func.max(Portfolio.updated_at)),
+            *fingerprint(Scenario, func.max(Scenario.created_at))
+        ).where(User.id == user_id)
+        return tuple(session.exec(statement).one())
+    
+    def _session_memo(self, session: Session, key: tuple, load):
+        """
+        Load export data once per session; a failed PDF render falls back to the
+        simpler renderers, which then reuse the rows instead of querying again
+        """
+        memo = session.info.setdefault("export_data", {})
+        if key not in memo:
+            memo[key] = load()
+        return memo[key]
+    
+    def get_latest_risk_assessment(self, session: Session, user_id: int) -> Optional[RiskAssessment]:
+        """Most recent risk assessment, picked by the database rather than sorted in Python"""
+        return self._session_memo(session, ("risk", user_id), lambda: session.exec(
+            LATEST_RISK_ASSESSMENT_STATEMENT, params={"user_id": user_id}
+        ).first())
+    
+    def get_latest_portfolio(self, session: Session, user_id: int) -> Optional[Portfolio]:
+        """Most recently created portfolio, with its holdings loaded"""
+        return self._session_memo(session, ("portfolio", user_id), lambda: session.exec(
+            LATEST_PORTFOLIO_STATEMENT, params={"user_id": user_id}
+        ).unique().first())
+    
+    def get_latest_scenarios(self, session: Session, user_id: int, limit: int) -> List[Scenario]:
+        """Newest scenarios first, at most limit of them"""
+        return self._session_memo(session, ("scenarios", user_id, limit), lambda: session.exec(
+            LATEST_SCENARIOS_STATEMENT, params={"user_id": user_id, "limit": limit}
+        ).all())
+    
+    def get_holding_views(self, session: Session, portfolio: Portfolio) -> List[HoldingView]:
+        """Formatted holdings of a portfolio, built once so a fallback render reuses them"""
+        return self._session_memo(session, ("holding_views", portfolio.id), lambda: [
+            HoldingView(
+                company_name=holding.company_name,
+                symbol=holding.symbol,
+                quantity=str(holding.quantity),
+                price=f"₹{holding.current_price}",
+                price_2dp=f"₹{holding.current_price:,.2f}",
+                value_2dp=f"₹{holding.total_value:,.2f}",
+                value_0dp=f"₹{holding.total_value:,.0f}",
+                sector=holding.sector or 'Unknown'
+            )
+            for holding in portfolio.holdings
+        ])
     
     def export_to_text(self, user: User, session: Session, include_risk_profile: bool = True, 
-                      include_portfolio: bool = True, include_scenarios: bool = True) -> str:
+                      include_portfolio: bool = True, include_scenarios: bool = True,
+                      generated_at: Optional[datetime] = None) -> str:
         """
         Export user's analysis results to text format
         """
-        content = []
-        content.append("=" * 60)
-        content.append("AI-POWERED RISK & SCENARIO ADVISOR REPORT")
-        content.append("=" * 60)
-        content.append(f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        content.append(f"User: {user.full_name or user.email}")
-        content.append("")
+        return self.text_report_header(user, generated_at or datetime.now()) + self.text_report_body(
+            user, session, include_risk_profile, include_portfolio, include_scenarios
+        )
+    
+    def text_report_header(self, user: User, generated_at: datetime) -> str:
+        """Banner, generation time and user lines that open the text report"""
+        return (
+            "=" * 60 + "\n"
+            "AI-POWERED RISK & SCENARIO ADVISOR REPORT\n"
+            + "=" * 60 + "\n"
+            f"Generated on: {generated_at.strftime('%Y-%m-%d %H:%M:%S')}\n"
+            f"User: {user.full_name or user.email}\n"
+            "\n"
+        )
+    
+    def text_report_body(self, user: User, session: Session, include_risk_profile: bool = True,
+                         include_portfolio: bool = True, include_scenarios: bool = True) -> str:
+        """Report sections after the header; depends only on the user's saved data, so it can be cached"""
+        buf = io.StringIO()
+        w = buf.write
         
         # Risk Profile Section
-        if include_risk_profile and user.risk_assessments:
-            latest_risk = sorted(user.risk_assessments, key=lambda x: x.created_at, reverse=True)[0]
-            content.append("RISK TOLERANCE ASSESSMENT")
-            content.append("-" * 30)
-            content.append(f"Risk Category: {latest_risk.category}")
-            content.append(f"Risk Score: {latest_risk.score}/24")
-            content.append(f"Description: {latest_risk.description}")
-            content.append("")
-            content.append("Recommendations:")
-            recommendations = json.loads(latest_risk.recommendations)
+        latest_risk = self.get_latest_risk_assessment(session, user.id) if include_risk_profile else None
+        if latest_risk:
+            w("RISK TOLERANCE ASSESSMENT\n")
+            w("-" * 30 + "\n")
+            w(f"Risk Category: {latest_risk.category}\n")
+            w(f"Risk Score: {latest_risk.score}/24\n")
+            w(f"Description: {latest_risk.description}\n")
+            w("\n")
+            w("Recommendations:\n")
+            recommendations = json_utils.loads(latest_risk.recommendations)
             for rec in recommendations:
-                content.append(f"• {rec}")
-            content.append("")
+                w(f"• {rec}\n")
+            w("\n")
         
         # Portfolio Analysis Section
-        if include_portfolio and user.portfolios:
-            latest_portfolio = sorted(user.portfolios, key=lambda x: x.created_at, reverse=True)[0]
-            holdings_stmt = select(Holding).where(Holding.portfolio_id == latest_portfolio.id)
-            holdings = session.exec(holdings_stmt).all()
+        latest_portfolio = self.get_latest_portfolio(session, user.id) if include_portfolio else None
+        if latest_portfolio:
+            holdings = latest_portfolio.holdings
             
-            content.append("PORTFOLIO ANALYSIS")
-            content.append("-" * 20)
-            content.append(f"Total Portfolio Value: ₹{latest_portfolio.total_value:,.2f}")
-            content.append(f"Number of Holdings: {len(holdings)}")
-            content.append("")
-            content.append("Holdings Detail:")
+            w("PORTFOLIO ANALYSIS\n")
+            w("-" * 20 + "\n")
+            w(f"Total Portfolio Value: ₹{latest_portfolio.total_value:,.2f}\n")
+            w(f"Number of Holdings: {len(holdings)}\n")
+            w("\n")
+            w("Holdings Detail:\n")
             
-            for holding in holdings:
-                content.append(f"• {holding.company_name} ({holding.symbol})")
-                content.append(f"  Quantity: {holding.quantity}")
-                content.append(f"  Current Price: ₹{holding.current_price}")
-                content.append(f"  Total Value: ₹{holding.total_value:,.2f}")
-                content.append(f"  Sector: {holding.sector or 'Unknown'}")
-                content.append("")
+            for holding in self.get_holding_views(session, latest_portfolio):
+                w(f"• {holding.company_name} ({holding.symbol})\n")
+                w(f"  Quantity: {holding.quantity}\n")
+                w(f"  Current Price: {holding.price}\n")
+                w(f"  Total Value: {holding.value_2dp}\n")
+                w(f"  Sector: {holding.sector}\n")
+                w("\n")
         
         # Scenario Analysis Section
-        if include_scenarios and user.scenarios:
-            content.append("SCENARIO ANALYSIS RESULTS")
-            content.append("-" * 30)
+        latest_scenarios = self.get_latest_scenarios(session, user.id, 5) if include_scenarios else []
+        if latest_scenarios:
+            w("SCENARIO ANALYSIS RESULTS\n")
+            w("-" * 30 + "\n")
             
-            for i, scenario in enumerate(sorted(user.scenarios, key=lambda x: x.created_at, reverse=True)[:5], 1):
-                content.append(f"Analysis {i}:")
-                content.append(f"Date: {scenario.created_at.strftime('%Y-%m-%d %H:%M:%S')}")
-                content.append(f"Scenario: {scenario.scenario_text}")
-                content.append("")
-                content.append("AI Analysis:")
-                content.append(scenario.analysis_narrative)
-                content.append("")
+            for i, scenario in enumerate(latest_scenarios, 1):
+                w(f"Analysis {i}:\n")
+                w(f"Date: {scenario.created_at.strftime('%Y-%m-%d %H:%M:%S')}\n")
+                w(f"Scenario: {scenario.scenario_text}\n")
+                w("\n")
+                w("AI Analysis:\n")
+                w(scenario.analysis_narrative)
+                w("\n")
+                w("\n")
                 
-                insights = json.loads(scenario.insights) if scenario.insights else []
+                insights = _load_json_list(scenario.insights)
                 valid_insights = []
                 for insight in insights:
                     if insight and isinstance(insight, str) and insight.strip():
                         # Clean up any markdown-like syntax and HTML tags
-                        clean_insight = insight.replace('###', '').replace('**', '').replace('*', '')
-                        clean_insight = re.sub(r'<[^>]*>', '', clean_insight).strip()
+                        clean_insight = _strip_markdown(insight)
+                        clean_insight = _HTML_TAG_RE.sub('', clean_insight).strip()
                         if clean_insight and len(clean_insight) > 10:
                             valid_insights.append(clean_insight)
                 
                 if valid_insights:
-                    content.append("Key Insights:")
+                    w("Key Insights:\n")
                     for insight in valid_insights:
-                        content.append(f"• {insight}")
-                    content.append("")
+                        w(f"• {insight}\n")
+                    w("\n")
                 
-                recommendations = json.loads(scenario.recommendations) if scenario.recommendations else []
+                recommendations = _load_json_list(scenario.recommendations)
                 valid_recommendations = []
                 for rec in recommendations:
                     if rec and isinstance(rec, str) and rec.strip():
                         # Clean up any markdown-like syntax and HTML tags
-                        clean_rec = rec.replace('###', '').replace('**', '').replace('*', '')
-                        clean_rec = re.sub(r'<[^>]*>', '', clean_rec).strip()
+                        clean_rec = _strip_markdown(rec)
+                        clean_rec = _HTML_TAG_RE.sub('', clean_rec).strip()
                         if clean_rec and len(clean_rec) > 10:
                             valid_recommendations.append(clean_rec)
                 
                 if valid_recommendations:
-                    content.append("Recommendations:")
+                    w("Recommendations:\n")
                     for rec in valid_recommendations:
-                        content.append(f"• {rec}")
-                    content.append("")
+                        w(f"• {rec}\n")
+                    w("\n")
                 
                 if scenario.risk_assessment:
-                    content.append("Risk Assessment:")
-                    content.append(scenario.risk_assessment)
-                    content.append("")
+                    w("Risk Assessment:\n")
+                    w(scenario.risk_assessment)
+                    w("\n")
+                    w("\n")
                 
                 # Add enhanced fields if they exist
-                if scenario.risk_details:
-                    try:
-                        risk_details = json.loads(scenario.risk_details)
-                        if risk_details:
-                            content.append("Detailed Risk Analysis:")
-                            for key, value in risk_details.items():
-                                if isinstance(value, (int, float)):
-                                    content.append(f"  {key.replace('_', ' ').title()}: {value}")
-                                else:
-                                    content.append(f"  {key.replace('_', ' ').title()}: {value}")
-                            content.append("")
-                    except:
-                        pass
+                risk_details = _load_json_object(scenario.risk_details)
+                if risk_details:
+                    w("Detailed Risk Analysis:\n")
+                    for key, value in risk_details.items():
+                        w(f"  {_pretty_key(key)}: {value}\n")
+                    w("\n")
                 
-                if scenario.portfolio_impact:
-                    try:
-                        portfolio_impact = json.loads(scenario.portfolio_impact)
-                        if portfolio_impact:
-                            content.append("Portfolio Impact Analysis:")
-                            for key, value in portfolio_impact.items():
-                                if isinstance(value, (int, float)):
-                                    content.append(f"  {key.replace('_', ' ').title()}: {value}")
-                                else:
-                                    content.append(f"  {key.replace('_', ' ').title()}: {value}")
-                            content.append("")
-                    except:
-                        pass
+                portfolio_impact = _load_json_object(scenario.portfolio_impact)
+                if portfolio_impact:
+                    w("Portfolio Impact Analysis:\n")
+                    for key, value in portfolio_impact.items():
+                        w(f"  {_pretty_key(key)}: {value}\n")
+                    w("\n")
                 
-                content.append("-" * 50)
-                content.append("")
+                w("-" * 50 + "\n")
+                w("\n")
         
-        content.append("END OF REPORT")
-        content.append("=" * 60)
+        w("END OF REPORT\n")
+        w("=" * 60)
         
-        return "\n".join(content)
+        return buf.getvalue()
     
     def create_sector_pie_chart(self, holdings: List[Holding]) -> Optional[Drawing]:
-        """Create a pie chart for sector allocation with fast timeout protection"""
+        """Create a pie chart for sector allocation"""
         if not holdings:
             return None
         
-        start_time = time.time()
-        
         try:
             # Group holdings by sector
-            sector_data = {}
+            sector_data = defaultdict(float)
             for holding in holdings:
-                sector = holding.sector or 'Unknown'
-                if sector not in sector_data:
-                    sector_data[sector] = 0
-                sector_data[sector] += holding.total_value
+                sector_data[holding.sector or 'Unknown'] += holding.total_value
             
             if not sector_data:
                 return None
             
-            # Check timeout immediately
-            if time.time() - start_time > self.chart_timeout:
-                print("⚠️ Chart generation timeout, skipping pie chart")
-                return None
-            
-            # Create pie chart with minimal styling for speed
-            drawing = Drawing(250, 150)  # Smaller size for speed
-            pie = Pie()
-            pie.x = 125
-            pie.y = 75
-            pie.width = 100
-            pie.height = 100
-            
-            # Prepare data
-            sectors = list(sector_data.keys())
-            values = list(sector_data.values())
-            
-            pie.data = values
-            pie.labels = sectors
-            pie.slices.strokeWidth = 0.5
-            
-            # Add basic colors
-            colors_list = [colors.blue, colors.green, colors.red, colors.orange, colors.purple]
-            for i, slice in enumerate(pie.slices):
-                slice.fillColor = colors_list[i % len(colors_list)]
-            
-            drawing.add(pie)
-            
-            # Simple legend for speed
-            legend = Legend()
-            legend.x = 200
-            legend.y = 25
-            legend.alignment = 'right'
-            legend.fontName = 'Helvetica'
-            legend.fontSize = 7
-            legend.colorNamePairs = [(colors_list[i % len(colors_list)], sectors[i]) for i in range(len(sectors))]
-            drawing.add(legend)
-            
-            return drawing
+            return _build_sector_pie_chart(tuple(sector_data.items())).copy()
             
         except Exception as e:
-            print(f"⚠️ Error creating pie chart: {e}")
+            app_logger.warning(f"Error creating pie chart: {e}")
             return None
     
     def create_holdings_bar_chart(self, holdings: List[Holding]) -> Optional[Drawing]:
-        """Create a bar chart for holdings values with fast timeout protection"""
+        """Create a bar chart of the six largest holdings"""
         if not holdings:
             return None
         
-        start_time = time.time()
-        
         try:
             # Sort holdings by value (top 6 for speed)
-            sorted_holdings = sorted(holdings, key=lambda x: x.total_value, reverse=True)[:6]
+            sorted_holdings = heapq.nlargest(6, holdings, key=attrgetter("total_value"))
             
-            # Check timeout immediately
-            if time.time() - start_time > self.chart_timeout:
-                print("⚠️ Chart generation timeout, skipping bar chart")
-                return None
-            
-            drawing = Drawing(300, 150)  # Smaller size for speed
-            chart = VerticalBarChart()
-            chart.x = 50
-            chart.y = 25
-            chart.width = 200
-            chart.height = 100
-            
-            # Prepare data
-            symbols = [h.symbol for h in sorted_holdings]
-            values = [h.total_value for h in sorted_holdings]
-            
-            chart.data = [values]
-            chart.categoryAxis.categoryNames = symbols
-            chart.valueAxis.valueMin = 0
-            chart.valueAxis.valueMax = max(values) * 1.1
-            
-            # Basic styling for speed
-            chart.bars[0].fillColor = colors.blue
-            chart.bars[0].strokeColor = colors.black
-            chart.bars[0].strokeWidth = 0.5
-            
-            drawing.add(chart)
-            return drawing
+            return _build_holdings_bar_chart(
+                tuple((h.symbol, h.total_value) for h in sorted_holdings)
+            ).copy()
             
         except Exception as e:
-            print(f"⚠️ Error creating bar chart: {e}")
+            app_logger.warning(f"Error creating bar chart: {e}")
             return None
     
-    def export_to_pdf_simple(self, user: User, session: Session, include_risk_profile: bool = True,
-                     include_portfolio: bool = True, include_scenarios: bool = True) -> bytes:
-        """
-        Fallback PDF export method - creates a simple PDF without charts for reliability
-        """
-        try:
-            print("🔄 Using fallback PDF generation method")
-            
-            buffer = io.BytesIO()
-            doc = SimpleDocTemplate(buffer, pagesize=A4, 
+    def _new_pdf_doc(self, buffer: io.BytesIO) -> SimpleDocTemplate:
+        """A4 document with the margins shared by every PDF renderer"""
+        return SimpleDocTemplate(buffer, pagesize=A4, invariant=1,
                                  leftMargin=0.5*inch, rightMargin=0.5*inch,
                                  topMargin=0.5*inch, bottomMargin=0.5*inch)
-            story = []
-            
-            # Basic styles
-            styles = getSampleStyleSheet()
-            title_style = ParagraphStyle(
-                'SimpleTitle',
-                parent=styles['Heading1'],
-                fontSize=16,
-                spaceAfter=20,
-                alignment=TA_CENTER,
-                fontName='Helvetica-Bold'
-            )
-            
-            heading_style = ParagraphStyle(
-                'SimpleHeading',
-                parent=styles['Heading2'],
-                fontSize=14,
-                spaceAfter=12,
-                fontName='Helvetica-Bold'
-            )
-            
-            normal_style = styles['Normal']
-            
-            # Title
-            story.append(Paragraph("AI-Powered Risk & Scenario Advisor Report", title_style))
-            story.append(Paragraph(f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", normal_style))
-            story.append(Paragraph(f"User: {user.full_name or user.email}", normal_style))
+    
+    def _report_title(self, user: User, generated_at: datetime, title_style: ParagraphStyle,
+                      normal_style: ParagraphStyle) -> List[Paragraph]:
+        """Title, generation time and user lines that open every PDF report"""
+        return [
+            Paragraph("AI-Powered Risk & Scenario Advisor Report", title_style),
+            Paragraph(f"Generated on: {generated_at.strftime('%Y-%m-%d %H:%M:%S')}", normal_style),
+            Paragraph(f"User: {_para_text(user.full_name or user.email)}", normal_style)
+        ]
+    
+    def _build_pdf(self, doc: SimpleDocTemplate, buffer: io.BytesIO, story: list) -> bytes:
+        """Lay out the story, compressing only long reports, and return the PDF bytes"""
+        doc.pageCompression = 1 if len(story) >= PDF_COMPRESS_MIN_FLOWABLES else 0
+        doc.build(story)
+        pdf_data = buffer.getvalue()
+        buffer.close()
+        return pdf_data
+    
+    def _build_story(self, user: User, session: Session, profile: RenderProfile, include_risk_profile: bool,
+                     include_portfolio: bool, include_scenarios: bool, generated_at: datetime) -> list:
+        """Flowables for one report, laid out as the profile describes"""
+        normal_style = profile.normal_style
+        story = []
+        
+        # Title and metadata
+        story.extend(self._report_title(user, generated_at, profile.title_style, normal_style))
+        story.append(Spacer(1, profile.section_gap))
+        
+        if profile.detailed:
+            # Page header
+            story.append(Paragraph("─" * 80, HEADER_FOOTER_STYLE))
+            story.append(Paragraph("AI-Powered Risk & Scenario Advisor – Export Report", HEADER_FOOTER_STYLE))
+            story.append(Paragraph(f"Generated: {generated_at.strftime('%Y-%m-%d %H:%M:%S')} | User: {_para_text(user.full_name or user.email)}", HEADER_FOOTER_STYLE))
+            story.append(Paragraph("─" * 80, HEADER_FOOTER_STYLE))
             story.append(Spacer(1, 20))
+        
+        # Risk Profile Section
+        latest_risk = self.get_latest_risk_assessment(session, user.id) if include_risk_profile else None
+        if latest_risk:
+            story.append(Paragraph("Risk Tolerance Assessment", profile.heading_style))
             
-            # Risk Profile Section
-            if include_risk_profile and user.risk_assessments:
-                story.append(Paragraph("Risk Tolerance Assessment", heading_style))
-                latest_risk = sorted(user.risk_assessments, key=lambda x: x.created_at, reverse=True)[0]
-                
+            if profile.risk_table_style is None:
+                story.append(Paragraph(f"Risk Category: {latest_risk.category}", normal_style))
+                story.append(Paragraph(f"Risk Score: {latest_risk.score}/24", normal_style))
+                story.append(Paragraph(f"Description: {_para_text(latest_risk.description)}", normal_style))
+            else:
                 risk_data = [
                     ['Risk Category', latest_risk.category],
-                    ['Risk Score', f"{latest_risk.score}/24"],
-                    ['Description', latest_risk.description]
+                    ['Risk Score', f"{latest_risk.score}/24"]
                 ]
+                if not profile.detailed:
+                    risk_data.append(['Description', latest_risk.description])
                 
-                risk_table = Table(risk_data, colWidths=[1.5*inch, 4.5*inch])
-                risk_table.setStyle(TableStyle([
-                    ('BACKGROUND', (0, 0), (0, -1), colors.lightgrey),
-                    ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                    ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-                    ('FONTSIZE', (0, 0), (-1, -1), 10),
-                ]))
-                
+                risk_table = Table(risk_data, colWidths=profile.risk_table_col_widths)
+                risk_table.setStyle(profile.risk_table_style)
                 story.append(risk_table)
-                story.append(Spacer(1, 15))
-                
-                story.append(Paragraph("Recommendations:", heading_style))
-                recommendations = json.loads(latest_risk.recommendations)
-                for rec in recommendations:
-                    story.append(Paragraph(f"• {rec}", normal_style))
-                
-                story.append(Spacer(1, 20))
-            
-            # Portfolio Analysis Section
-            if include_portfolio and user.portfolios:
-                story.append(Paragraph("Portfolio Analysis", heading_style))
-                
-                latest_portfolio = sorted(user.portfolios, key=lambda x: x.created_at, reverse=True)[0]
-                holdings_stmt = select(Holding).where(Holding.portfolio_id == latest_portfolio.id)
-                holdings = session.exec(holdings_stmt).all()
-                
-                story.append(Paragraph(f"Total Portfolio Value: ₹{latest_portfolio.total_value:,.2f}", normal_style))
-                story.append(Paragraph(f"Number of Holdings: {len(holdings)}", normal_style))
-                story.append(Spacer(1, 15))
-                
-                # Simple holdings table
-                holdings_data = [['Company', 'Symbol', 'Quantity', 'Value (₹)', 'Sector']]
-                
-                for holding in holdings:
-                    company_name = holding.company_name
-                    if len(company_name) > 20:
-                        company_name = company_name[:17] + "..."
-                    
-                    holdings_data.append([
-                        company_name,
-                        holding.symbol,
-                        str(holding.quantity),
-                        f"₹{holding.total_value:,.0f}",
-                        holding.sector or 'Unknown'
-                    ])
-                
-                holdings_table = Table(holdings_data, colWidths=[2.5*inch, 0.8*inch, 0.7*inch, 1.2*inch, 1.0*inch])
-                holdings_table.setStyle(TableStyle([
-                    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-                    ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                    ('FONTSIZE', (0, 0), (-1, -1), 9),
-                ]))
-                
-                story.append(holdings_table)
-                story.append(Spacer(1, 20))
-            
-            # Scenario Analysis Section
-            if include_scenarios and user.scenarios:
-                story.append(Paragraph("Scenario Analysis Results", heading_style))
-                
-                latest_scenarios = sorted(user.scenarios, key=lambda x: x.created_at, reverse=True)[:2]  # Limit to 2 for simplicity
-                
-                for i, scenario in enumerate(latest_scenarios, 1):
-                    story.append(Paragraph(f"Scenario {i}:", heading_style))
-                    story.append(Paragraph(f"Date: {scenario.created_at.strftime('%Y-%m-%d %H:%M:%S')}", normal_style))
-                    story.append(Paragraph(f"Scenario: {scenario.scenario_text}", normal_style))
-                    story.append(Spacer(1, 10))
-                    
-                    story.append(Paragraph("AI Analysis:", normal_style))
-                    story.append(Paragraph(scenario.analysis_narrative, normal_style))
-                    story.append(Spacer(1, 10))
-                    
-                    if scenario.risk_assessment:
-                        story.append(Paragraph("Risk Assessment:", normal_style))
-                        story.append(Paragraph(scenario.risk_assessment, normal_style))
-                        story.append(Spacer(1, 10))
-                    
-                    if i < len(latest_scenarios):
-                        story.append(PageBreak())
-                        story.append(Spacer(1, 20))
-            
-            # Footer
-            story.append(Spacer(1, 20))
-            story.append(Paragraph("End of Report", normal_style))
-            
-            # Build PDF
-            doc.build(story)
-            pdf_data = buffer.getvalue()
-            buffer.close()
-            
-            print("✅ Fallback PDF generated successfully")
-            return pdf_data
-            
-        except Exception as e:
-            print(f"❌ Fallback PDF generation also failed: {e}")
-            buffer.close()
-            # Final fallback to text
-            text_content = self.export_to_text(user, session, include_risk_profile, include_portfolio, include_scenarios)
-            return text_content.encode('utf-8')
-    
-    def export_to_pdf_fast(self, user: User, session: Session, include_risk_profile: bool = True,
-                          include_portfolio: bool = True, include_scenarios: bool = True) -> bytes:
-        """
-        Ultra-fast PDF export method - no charts, minimal styling for maximum speed
-        """
-        try:
-            print("⚡ Using ultra-fast PDF generation method")
+            story.append(Spacer(1, profile.block_gap))
             
-            buffer = io.BytesIO()
-            doc = SimpleDocTemplate(buffer, pagesize=A4, 
-                                 leftMargin=0.5*inch, rightMargin=0.5*inch,
-                                 topMargin=0.5*inch, bottomMargin=0.5*inch)
-            story = []
+            if profile.detailed:
+                # Show description separately for better readability
+                story.append(Paragraph("Description:", profile.label_style))
+                story.append(Paragraph(_para_text(latest_risk.description), normal_style))
+                story.append(Spacer(1, profile.block_gap))
             
-            # Basic styles for speed
-            styles = getSampleStyleSheet()
-            title_style = ParagraphStyle(
-                'FastTitle',
-                parent=styles['Heading1'],
-                fontSize=16,
-                spaceAfter=15,
-                alignment=TA_CENTER,
-                fontName='Helvetica-Bold'
-            )
+            story.append(Paragraph("Recommendations:", profile.subheading_style))
+            recommendations = json_utils.loads(latest_risk.recommendations)
+            story.extend(Paragraph(f"• {_para_text(rec)}", normal_style) for rec in recommendations)
             
-            heading_style = ParagraphStyle(
-                'FastHeading',
-                parent=styles['Heading2'],
-                fontSize=12,
-                spaceAfter=10,
-                fontName='Helvetica-Bold'
-            )
+            story.append(Spacer(1, profile.section_gap))
+        
+        # Portfolio Analysis Section
+        latest_portfolio = self.get_latest_portfolio(session, user.id) if include_portfolio else None
+        if latest_portfolio:
+            story.append(Paragraph("Portfolio Analysis", profile.heading_style))
             
-            normal_style = styles['Normal']
+            holdings = latest_portfolio.holdings
             
-            # Title
-            story.append(Paragraph("AI-Powered Risk & Scenario Advisor Report", title_style))
-            story.append(Paragraph(f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", normal_style))
-            story.append(Paragraph(f"User: {user.full_name or user.email}", normal_style))
-            story.append(Spacer(1, 15))
+            # Portfolio summary
+            story.append(Paragraph(f"Total Portfolio Value: ₹{latest_portfolio.total_value:,.2f}", profile.label_style))
+            story.append(Paragraph(f"Number of Holdings: {len(holdings)}", normal_style))
+            story.append(Spacer(1, profile.block_gap))
             
-            # Risk Profile Section
-            if include_risk_profile and user.risk_assessments:
-                story.append(Paragraph("Risk Tolerance Assessment", heading_style))
-                latest_risk = sorted(user.risk_assessments, key=lambda x: x.created_at, reverse=True)[0]
-                
-                story.append(Paragraph(f"Risk Category: {latest_risk.category}", normal_style))
-                story.append(Paragraph(f"Risk Score: {latest_risk.score}/24", normal_style))
-                story.append(Paragraph(f"Description: {latest_risk.description}", normal_style))
-                story.append(Spacer(1, 10))
-                
-                story.append(Paragraph("Recommendations:", heading_style))
-                recommendations = json.loads(latest_risk.recommendations)
-                for rec in recommendations:
-                    story.append(Paragraph(f"• {rec}", normal_style))
-                
-                story.append(Spacer(1, 15))
+            if profile.include_charts:
+                charts = [
+                    chart for chart in (self.create_sector_pie_chart(holdings), self.create_holdings_bar_chart(holdings))
+                    if chart is not None
+                ]
+                if charts:
+                    story.extend(charts)
+                    story.append(Spacer(1, profile.block_gap))
             
-            # Portfolio Analysis Section
-            if include_portfolio and user.portfolios:
-                story.append(Paragraph("Portfolio Analysis", heading_style))
-                
-                latest_portfolio = sorted(user.portfolios, key=lambda x: x.created_at, reverse=True)[0]
-                holdings_stmt = select(Holding).where(Holding.portfolio_id == latest_portfolio.id)
-                holdings = session.exec(holdings_stmt).all()
-                
-                story.append(Paragraph(f"Total Portfolio Value: ₹{latest_portfolio.total_value:,.2f}", normal_style))
-                story.append(Paragraph(f"Number of Holdings: {len(holdings)}", normal_style))
-                story.append(Spacer(1, 10))
-                
-                # Simple holdings list for speed
-                story.append(Paragraph("Holdings:", heading_style))
+            if profile.detailed and holdings:
+                # [count, value] per sector
+                sector_summary = defaultdict(lambda: [0, 0])
                 for holding in holdings:
-                    story.append(Paragraph(f"• {holding.company_name} ({holding.symbol}): {holding.quantity} shares @ ₹{holding.current_price:,.2f} = ₹{holding.total_value:,.0f}", normal_style))
+                    totals = sector_summary[holding.sector or 'Unknown']
+                    totals[0] += 1
+                    totals[1] += holding.total_value
                 
-                story.append(Spacer(1, 15))
-            
-            # Scenario Analysis Section
-            if include_scenarios and user.scenarios:
-                story.append(Paragraph("Scenario Analysis Results", heading_style))
-                
-                # Limit to 1 scenario for maximum speed
-                latest_scenarios = sorted(user.scenarios, key=lambda x: x.created_at, reverse=True)[:1]
-                
-                for i, scenario in enumerate(latest_scenarios, 1):
-                    story.append(Paragraph(f"Scenario {i}:", heading_style))
-                    story.append(Paragraph(f"Date: {scenario.created_at.strftime('%Y-%m-%d %H:%M:%S')}", normal_style))
-                    story.append(Paragraph(f"Scenario: {scenario.scenario_text}", normal_style))
-                    story.append(Spacer(1, 8))
-                    
-                    story.append(Paragraph("AI Analysis:", normal_style))
-                    story.append(Paragraph(scenario.analysis_narrative, normal_style))
-                    story.append(Spacer(1, 8))
-                    
-                    if scenario.risk_assessment:
-                        story.append(Paragraph("Risk Assessment:", normal_style))
-                        story.append(Paragraph(scenario.risk_assessment, normal_style))
-                        story.append(Spacer(1, 8))
-            
-            # Footer
-            story.append(Spacer(1, 15))
-            story.append(Paragraph("End of Report", normal_style))
-            
-            # Build PDF
-            doc.build(story)
-            pdf_data = buffer.getvalue()
-            buffer.close()
+                story.append(Paragraph("Sector Allocation Summary:", profile.subheading_style))
+                total_value = latest_portfolio.total_value
+                story.extend(
+                    Paragraph(f"• {_para_text(sector)}: {count} holdings, ₹{value:,.0f} ({value / total_value * 100:.1f}%)", normal_style)
+                    for sector, (count, value) in sector_summary.items()
+                )
+                story.append(Spacer(1, profile.block_gap))
             
-            print("✅ Ultra-fast PDF generated successfully")
-            return pdf_data
-            
-        except Exception as e:
-            print(f"❌ Ultra-fast PDF generation failed: {e}")
-            buffer.close()
-            # Final fallback to text
-            text_content = self.export_to_text(user, session, include_risk_profile, include_portfolio, include_scenarios)
-            return text_content.encode('utf-8')
-    
-    def export_to_pdf(self, user: User, session: Session, include_risk_profile: bool = True,
-                     include_portfolio: bool = True, include_scenarios: bool = True) -> bytes:
-        """
-        Export user's analysis results to PDF format with improved formatting (NO CHARTS) for maximum speed
-        """
-        start_time = time.time()
-        enable_charts = False  # Charts completely disabled for maximum speed
-        
-        try:
-            print(f"📄 Starting PDF export for user {user.email} (charts disabled for speed)")
-            
-            buffer = io.BytesIO()
-            doc = SimpleDocTemplate(buffer, pagesize=A4, 
-                                 leftMargin=0.5*inch, rightMargin=0.5*inch,
-                                 topMargin=0.5*inch, bottomMargin=0.5*inch)
-            story = []
-            
-            # Enhanced Styles
-            styles = getSampleStyleSheet()
-            
-            # Title style with better formatting
-            title_style = ParagraphStyle(
-                'CustomTitle',
-                parent=styles['Heading1'],
-                fontSize=18,
-                spaceAfter=20,
-                alignment=TA_CENTER,
-                fontName='Helvetica-Bold',
-                textColor=colors.darkblue
+            # One table rather than a Paragraph per holding keeps the build fast
+            if profile.holdings_caption:
+                story.append(Paragraph(profile.holdings_caption, profile.subheading_style))
+            holding_cells = attrgetter(*profile.holdings_fields)
+            holdings_data = [['Company', *(HOLDINGS_COLUMN_HEADERS[field] for field in profile.holdings_fields)]]
+            holdings_data.extend(
+                [holding.truncated_name(profile.holdings_name_width), *holding_cells(holding)]
+                for holding in self.get_holding_views(session, latest_portfolio)
             )
             
-            # Section heading style
-            heading_style = ParagraphStyle(
-                'CustomHeading',
-                parent=styles['Heading2'],
-                fontSize=14,
-                spaceAfter=15,
-                spaceBefore=20,
-                fontName='Helvetica-Bold',
-                textColor=colors.darkblue,
-                borderWidth=1,
-                borderColor=colors.lightgrey,
-                borderPadding=5,
-                backColor=colors.lightgrey
-            )
-            
-            # Subheading style
-            subheading_style = ParagraphStyle(
-                'CustomSubheading',
-                parent=styles['Heading3'],
-                fontSize=12,
-                spaceAfter=10,
-                spaceBefore=15,
-                fontName='Helvetica-Bold',
-                textColor=colors.darkblue
-            )
-            
-            # Normal text style with better spacing
-            normal_style = ParagraphStyle(
-                'CustomNormal',
-                parent=styles['Normal'],
-                fontSize=10,
-                spaceAfter=6,
-                fontName='Helvetica',
-                alignment=TA_LEFT,
-                leading=14
-            )
-            
-            # Title and metadata
-            story.append(Paragraph("AI-Powered Risk & Scenario Advisor Report", title_style))
-            story.append(Paragraph(f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", normal_style))
-            story.append(Paragraph(f"User: {user.full_name or user.email}", normal_style))
-            story.append(Spacer(1, 25))
-            
-            # Add page header and footer styles
-            header_footer_style = ParagraphStyle(
-                'HeaderFooter',
-                parent=styles['Normal'],
-                fontSize=8,
-                textColor=colors.grey,
-                alignment=TA_CENTER,
-                spaceAfter=0,
-                spaceBefore=0
-            )
-            
-            # Add page header
-            story.append(Paragraph("─" * 80, header_footer_style))
-            story.append(Paragraph("AI-Powered Risk & Scenario Advisor – Export Report", header_footer_style))
-            story.append(Paragraph(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} | User: {user.full_name or user.email}", header_footer_style))
-            story.append(Paragraph("─" * 80, header_footer_style))
-            story.append(Spacer(1, 20))
-            
-            # Risk Profile Section
-            if include_risk_profile and user.risk_assessments:
-                print("📊 Adding risk profile section")
-                story.append(Paragraph("Risk Tolerance Assessment", heading_style))
-                
-                latest_risk = sorted(user.risk_assessments, key=lambda x: x.created_at, reverse=True)[0]
-                
-                # Risk summary table with better formatting
-                risk_data = [
-                    ['Risk Category', latest_risk.category],
-                    ['Risk Score', f"{latest_risk.score}/24"]
-                ]
-                
-                # Calculate column widths based on content - give more space to Description
-                risk_table = Table(risk_data, colWidths=[1.2*inch, 4.8*inch])  # Reduced first column, increased second
-                risk_table.setStyle(TableStyle([
-                    ('BACKGROUND', (0, 0), (0, -1), colors.lightgrey),
-                    ('BACKGROUND', (1, 0), (1, -1), colors.white),
-                    ('TEXTCOLOR', (0, 0), (0, -1), colors.darkblue),
-                    ('TEXTCOLOR', (1, 0), (1, -1), colors.black),
-                    ('ALIGN', (0, 0), (0, -1), 'LEFT'),
-                    ('ALIGN', (1, 0), (1, -1), 'LEFT'),
-                    ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-                    ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
-                    ('FONTSIZE', (0, 0), (-1, -1), 10),
-                    ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-                    ('TOPPADDING', (0, 0), (-1, -1), 8),
-                    ('GRID', (0, 0), (-1, -1), 1, colors.lightgrey),
-                    ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-                    ('WORDWRAP', (0, 0), (-1, -1), True),
-                    ('LEFTPADDING', (0, 0), (-1, -1), 6),  # Add left padding for better text spacing
-                    ('RIGHTPADDING', (0, 0), (-1, -1), 6),  # Add right padding for better text spacing
-                    ('ROWBACKGROUNDS', (0, 0), (-1, -1), [colors.lightgrey, colors.white]),  # Better row highlighting
-                ]))
-                
-                story.append(risk_table)
-                story.append(Spacer(1, 15))
-                
-                # Show description separately for better readability
-                story.append(Paragraph("Description:", subheading_style))
-                story.append(Paragraph(latest_risk.description, normal_style))
-                story.append(Spacer(1, 15))
-                
-                # Recommendations with better formatting
-                story.append(Paragraph("Recommendations:", subheading_style))
-                recommendations = json.loads(latest_risk.recommendations)
-                for rec in recommendations:
-                    story.append(Paragraph(f"• {rec}", normal_style))
-                
-                story.append(Spacer(1, 25))
+            holdings_table = Table(holdings_data, colWidths=profile.holdings_table_col_widths)
+            holdings_table.setStyle(profile.holdings_table_style)
+            story.append(holdings_table)
+            story.append(Spacer(1, profile.section_gap))
+        
+        # Scenario Analysis Section
+        latest_scenarios = self.get_latest_scenarios(session, user.id, profile.scenarios_limit) if include_scenarios else []
+        if latest_scenarios:
+            story.append(Paragraph("Scenario Analysis Results", profile.heading_style))
             
-            # Portfolio Analysis Section
-            if include_portfolio and user.portfolios:
-                print("📈 Adding portfolio analysis section")
-                story.append(Paragraph("Portfolio Analysis", heading_style))
-                
-                latest_portfolio = sorted(user.portfolios, key=lambda x: x.created_at, reverse=True)[0]
-                holdings_stmt = select(Holding).where(Holding.portfolio_id == latest_portfolio.id)
-                holdings = session.exec(holdings_stmt).all()
+            for i, scenario in enumerate(latest_scenarios, 1):
+                # Each scenario after the first starts on a new page
+                if i > 1:
+                    if profile.detailed:
+                        story.append(Spacer(1, 20))
+                        story.append(Paragraph("─" * 80, normal_style))  # Visual separator
+                        story.append(Spacer(1, 20))
+                    story.append(PageBreak())
+                    story.append(Spacer(1, 20))
                 
-                # Portfolio summary
-                story.append(Paragraph(f"Total Portfolio Value: ₹{latest_portfolio.total_value:,.2f}", subheading_style))
-                story.append(Paragraph(f"Number of Holdings: {len(holdings)}", normal_style))
-                story.append(Spacer(1, 15))
+                story.append(Paragraph(profile.scenario_title.format(i), profile.subheading_style))
+                story.append(Paragraph(f"Date: {scenario.created_at.strftime('%Y-%m-%d %H:%M:%S')}", normal_style))
+                story.append(Paragraph(f"Scenario: {_para_text(scenario.scenario_text)}", normal_style))
+                story.append(Spacer(1, profile.scenario_gap))
                 
-                # Charts completely disabled for speed
-                print("📊 Charts disabled for maximum speed")
+                if scenario.analysis_narrative:
+                    story.append(Paragraph("AI Analysis:", profile.label_style))
+                    narrative = _strip_markdown(scenario.analysis_narrative) if profile.detailed else scenario.analysis_narrative
+                    story.append(Paragraph(_para_text(narrative), normal_style))
+                    story.append(Spacer(1, profile.scenario_gap))
                 
-                # Add sector summary text instead of charts
-                if holdings:
-                    sector_summary = {}
-                    for holding in holdings:
-                        sector = holding.sector or 'Unknown'
-                        if sector not in sector_summary:
-                            sector_summary[sector] = {'count': 0, 'value': 0}
-                        sector_summary[sector]['count'] += 1
-                        sector_summary[sector]['value'] += holding.total_value
+                if profile.detailed:
+                    # Key Insights with proper bullet formatting
+                    insights = _load_json_list(scenario.insights)
+                    valid_insights = []
+                    for insight in insights:
+                        if insight and isinstance(insight, str) and insight.strip():
+                            # Clean up any markdown-like syntax and HTML tags
+                            clean_insight = _strip_markdown(insight)
+                            clean_insight = _HTML_TAG_RE.sub('', clean_insight).strip()
+                            if clean_insight and len(clean_insight) > 10:
+                                valid_insights.append(clean_insight)
                     
-                    if sector_summary:
-                        story.append(Paragraph("Sector Allocation Summary:", subheading_style))
-                        for sector, data in sector_summary.items():
-                            percentage = (data['value'] / latest_portfolio.total_value) * 100
-                            story.append(Paragraph(f"• {sector}: {data['count']} holdings, ₹{data['value']:,.0f} ({percentage:.1f}%)", normal_style))
-                        story.append(Spacer(1, 15))
-                
-                # Holdings table with improved formatting
-                print("📋 Creating holdings table")
-                holdings_data = [['Company', 'Symbol', 'Quantity', 'Price (₹)', 'Value (₹)', 'Sector']]
-                
-                for holding in holdings:
-                    # Truncate long company names for better table display
-                    company_name = holding.company_name
-                    if len(company_name) > 25:
-                        company_name = company_name[:22] + "..."
+                    if valid_insights:
+                        story.append(Paragraph("Key Insights:", profile.label_style))
+                        story.extend(Paragraph(f"• {_para_text(insight)}", normal_style) for insight in valid_insights)
+                        story.append(Spacer(1, profile.scenario_gap))
                     
-                    holdings_data.append([
-                        company_name,
-                        holding.symbol,
-                        str(holding.quantity),
-                        f"₹{holding.current_price:,.2f}",
-                        f"₹{holding.total_value:,.0f}",
-                        holding.sector or 'Unknown'
-                    ])
-                
-                # Calculate optimal column widths
-                col_widths = [2.2*inch, 0.8*inch, 0.7*inch, 1.0*inch, 1.2*inch, 1.1*inch]
-                holdings_table = Table(holdings_data, colWidths=col_widths)
-                
-                holdings_table.setStyle(TableStyle([
-                    ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
-                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-                    ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-                    ('ALIGN', (0, 1), (-1, -1), 'CENTER'),
-                    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                    ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-                    ('FONTSIZE', (0, 0), (-1, -1), 9),
-                    ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-                    ('TOPPADDING', (0, 0), (-1, -1), 6),
-                    ('BACKGROUND', (0, 1), (-1, -1), colors.white),
-                    ('GRID', (0, 0), (-1, -1), 0.5, colors.lightgrey),
-                    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                    ('WORDWRAP', (0, 0), (-1, -1), True),
-                    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey]),
-                ]))
+                    # Recommendations with proper bullet formatting
+                    recommendations = _load_json_list(scenario.recommendations)
+                    valid_recommendations = []
+                    for rec in recommendations:
+                        if rec and isinstance(rec, str) and rec.strip():
+                            # Clean up any markdown-like syntax and HTML tags
+                            clean_rec = _strip_markdown(rec)
+                            clean_rec = _HTML_TAG_RE.sub('', clean_rec).strip()
+                            if clean_rec and len(clean_rec) > 10:
+                                valid_recommendations.append(clean_rec)
+                    
+                    if valid_recommendations:
+                        story.append(Paragraph("Recommendations:", profile.label_style))
+                        story.extend(Paragraph(f"• {_para_text(rec)}", normal_style) for rec in valid_recommendations)
+                        story.append(Spacer(1, profile.scenario_gap))
                 
-                story.append(holdings_table)
-                story.append(Spacer(1, 25))
-            
-            # Scenario Analysis Section - COMPLETELY REWRITTEN
-            if include_scenarios and user.scenarios:
-                print("🔮 Adding scenario analysis section")
-                story.append(Paragraph("Scenario Analysis Results", heading_style))
+                if scenario.risk_assessment:
+                    story.append(Paragraph("Risk Assessment:", profile.label_style))
+                    risk_assessment = _strip_markdown(scenario.risk_assessment) if profile.detailed else scenario.risk_assessment
+                    story.append(Paragraph(_para_text(risk_assessment), normal_style))
+                    story.append(Spacer(1, profile.scenario_gap))
                 
-                # Get latest scenarios (limit to 2 for PDF readability and speed)
-                latest_scenarios = sorted(user.scenarios, key=lambda x: x.created_at, reverse=True)[:2]
+                if not profile.detailed:
+                    continue
                 
-                for i, scenario in enumerate(latest_scenarios, 1):
-                    print(f"📝 Processing scenario {i}/{len(latest_scenarios)}")
+                # Enhanced Risk Details with structured table
+                risk_details = _load_json_object(scenario.risk_details)
+                if risk_details:
+                    story.append(Paragraph("Detailed Risk Analysis:", profile.label_style))
                     
-                    # Add page break for scenarios after the first one
-                    if i > 1:
-                        story.append(PageBreak())
-                        story.append(Spacer(1, 20))
+                    risk_table_data = [['Risk Metric', 'Value'], *(
+                        [_pretty_key(key), _cell_text(value, '.2f')]
+                        for key, value in risk_details.items()
+                    )]
                     
-                    # Scenario Header with clear structure
-                    story.append(Paragraph(f"Scenario Analysis {i}", subheading_style))
-                    story.append(Paragraph(f"Date: {scenario.created_at.strftime('%Y-%m-%d %H:%M:%S')}", normal_style))
-                    story.append(Paragraph(f"Scenario: {scenario.scenario_text}", normal_style))
-                    story.append(Spacer(1, 15))
+                    risk_details_table = Table(risk_table_data, colWidths=DETAIL_TABLE_COL_WIDTHS)
+                    risk_details_table.setStyle(DETAIL_TABLE_STYLE)
+                    story.append(risk_details_table)
+                    story.append(Spacer(1, profile.scenario_gap))
+                
+                # Portfolio Impact Analysis with structured tables
+                portfolio_impact = _load_json_object(scenario.portfolio_impact)
+                if portfolio_impact:
+                    story.append(Paragraph("Portfolio Impact Analysis:", profile.label_style))
                     
-                    # AI Analysis narrative with proper formatting
-                    if scenario.analysis_narrative:
-                        story.append(Paragraph("AI Analysis:", subheading_style))
-                        # Clean up any markdown-like syntax and ensure proper text wrapping
-                        clean_narrative = scenario.analysis_narrative.replace('###', '').replace('**', '').replace('*', '')
-                        story.append(Paragraph(clean_narrative, normal_style))
-                        story.append(Spacer(1, 15))
+                    impact_table_data = [['Impact Metric', 'Value'], *(
+                        [_pretty_key(key), _cell_text(value, '.4f')]
+                        for key, value in portfolio_impact.items()
+                        if key != 'affected_sectors'  # Handle sectors separately
+                    )]
                     
-                    # Key Insights with proper bullet formatting
-                    try:
-                        insights = json.loads(scenario.insights) if scenario.insights else []
-                        valid_insights = []
-                        for insight in insights:
-                            if insight and isinstance(insight, str) and insight.strip():
-                                # Clean up any markdown-like syntax and HTML tags
-                                clean_insight = insight.replace('###', '').replace('**', '').replace('*', '')
-                                clean_insight = re.sub(r'<[^>]*>', '', clean_insight).strip()
-                                if clean_insight and len(clean_insight) > 10:
-                                    valid_insights.append(clean_insight)
-                        
-                        if valid_insights:
-                            story.append(Paragraph("Key Insights:", subheading_style))
-                            for insight in valid_insights:
-                                story.append(Paragraph(f"• {insight}", normal_style))
-                            story.append(Spacer(1, 15))
-                    except:
-                        pass
+                    if len(impact_table_data) > 1:  # Only create table if we have data
+                        impact_table = Table(impact_table_data, colWidths=DETAIL_TABLE_COL_WIDTHS)
+                        impact_table.setStyle(DETAIL_TABLE_STYLE)
+                        story.append(impact_table)
+                        story.append(Spacer(1, profile.scenario_gap))
                     
-                    # Recommendations with proper bullet formatting
-                    try:
-                        recommendations = json.loads(scenario.recommendations) if scenario.recommendations else []
-                        valid_recommendations = []
-                        for rec in recommendations:
-                            if rec and isinstance(rec, str) and rec.strip():
-                                # Clean up any markdown-like syntax and HTML tags
-                                clean_rec = rec.replace('###', '').replace('**', '').replace('*', '')
-                                clean_rec = re.sub(r'<[^>]*>', '', clean_rec).strip()
-                                if clean_rec and len(clean_rec) > 10:
-                                    valid_recommendations.append(clean_rec)
+                    # Handle affected sectors if they exist
+                    affected_sectors = portfolio_impact.get('affected_sectors')
+                    if isinstance(affected_sectors, list) and affected_sectors:
+                        story.append(Paragraph("Affected Sectors:", profile.label_style))
                         
-                        if valid_recommendations:
-                            story.append(Paragraph("Recommendations:", subheading_style))
-                            for rec in valid_recommendations:
-                                story.append(Paragraph(f"• {rec}", normal_style))
-                            story.append(Spacer(1, 15))
-                    except:
-                        pass
-                    
-                    # Risk Assessment with structured display
-                    if scenario.risk_assessment:
-                        story.append(Paragraph("Risk Assessment:", subheading_style))
-                        # Clean up any markdown-like syntax
-                        clean_risk = scenario.risk_assessment.replace('###', '').replace('**', '').replace('*', '')
-                        story.append(Paragraph(clean_risk, normal_style))
-                        story.append(Spacer(1, 15))
-                    
-                    # Enhanced Risk Details with structured table
-                    if scenario.risk_details:
-                        try:
-                            risk_details = json.loads(scenario.risk_details)
-                            if risk_details:
-                                story.append(Paragraph("Detailed Risk Analysis:", subheading_style))
-                                
-                                # Create structured table for risk details
-                                risk_table_data = [['Risk Metric', 'Value']]
-                                for key, value in risk_details.items():
-                                    if isinstance(value, (int, float)):
-                                        risk_table_data.append([key.replace('_', ' ').title(), f"{value:.2f}"])
-                                    else:
-                                        risk_table_data.append([key.replace('_', ' ').title(), str(value)])
-                                
-                                if len(risk_table_data) > 1:  # Only create table if we have data
-                                    risk_details_table = Table(risk_table_data, colWidths=[2.5*inch, 2.5*inch])
-                                    risk_details_table.setStyle(TableStyle([
-                                        ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
-                                        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-                                        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                                        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                                        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-                                        ('FONTSIZE', (0, 0), (-1, -1), 9),
-                                        ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-                                        ('TOPPADDING', (0, 0), (-1, -1), 6),
-                                        ('GRID', (0, 0), (-1, -1), 0.5, colors.lightgrey),
-                                        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey]),
-                                    ]))
-                                    story.append(risk_details_table)
-                                    story.append(Spacer(1, 15))
-                        except:
-                            pass
-                    
-                    # Portfolio Impact Analysis with structured tables
-                    if scenario.portfolio_impact:
-                        try:
-                            portfolio_impact = json.loads(scenario.portfolio_impact)
-                            if portfolio_impact:
-                                story.append(Paragraph("Portfolio Impact Analysis:", subheading_style))
-                                
-                                # Create structured table for portfolio impact metrics
-                                impact_table_data = [['Impact Metric', 'Value']]
-                                for key, value in portfolio_impact.items():
-                                    if key != 'affected_sectors':  # Handle sectors separately
-                                        if isinstance(value, (int, float)):
-                                            impact_table_data.append([key.replace('_', ' ').title(), f"{value:.4f}"])
-                                        else:
-                                            impact_table_data.append([key.replace('_', ' ').title(), str(value)])
-                                
-                                if len(impact_table_data) > 1:  # Only create table if we have data
-                                    impact_table = Table(impact_table_data, colWidths=[2.5*inch, 2.5*inch])
-                                    impact_table.setStyle(TableStyle([
-                                        ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
-                                        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-                                        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                                        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                                        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-                                        ('FONTSIZE', (0, 0), (-1, -1), 9),
-                                        ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-                                        ('TOPPADDING', (0, 0), (-1, -1), 6),
-                                        ('GRID', (0, 0), (-1, -1), 0.5, colors.lightgrey),
-                                        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey]),
-                                    ]))
-                                    story.append(impact_table)
-                                    story.append(Spacer(1, 15))
-                                
-                                # Handle affected sectors if they exist
-                                if 'affected_sectors' in portfolio_impact and portfolio_impact['affected_sectors']:
-                                    try:
-                                        affected_sectors = portfolio_impact['affected_sectors']
-                                        if isinstance(affected_sectors, list) and affected_sectors:
-                                            story.append(Paragraph("Affected Sectors:", subheading_style))
-                                            
-                                            # Create structured table for affected sectors
-                                            sectors_table_data = [['Sector', 'Weight %', 'Impact', 'Risk Level']]
-                                            for sector_data in affected_sectors:
-                                                if isinstance(sector_data, dict):
-                                                    sector = sector_data.get('sector', 'Unknown')
-                                                    weight = sector_data.get('weight', 0)
-                                                    impact = sector_data.get('impact', 'Unknown')
-                                                    risk_level = sector_data.get('risk_level', 'Unknown')
-                                                    
-                                                    sectors_table_data.append([
-                                                        str(sector),
-                                                        f"{weight:.1f}%" if isinstance(weight, (int, float)) else str(weight),
-                                                        str(impact),
-                                                        str(risk_level)
-                                                    ])
-                                            
-                                            if len(sectors_table_data) > 1:  # Only create table if we have data
-                                                sectors_table = Table(sectors_table_data, colWidths=[1.5*inch, 1.0*inch, 1.5*inch, 1.0*inch])
-                                                sectors_table.setStyle(TableStyle([
-                                                    ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
-                                                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-                                                    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                                                    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                                                    ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-                                                    ('FONTSIZE', (0, 0), (-1, -1), 8),
-                                                    ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
-                                                    ('TOPPADDING', (0, 0), (-1, -1), 4),
-                                                    ('GRID', (0, 0), (-1, -1), 0.5, colors.lightgrey),
-                                                    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey]),
-                                                ]))
-                                                story.append(sectors_table)
-                                                story.append(Spacer(1, 15))
-                                    except:
-                                        pass
-                        except:
-                            pass
+                        sectors_table_data = [['Sector', 'Weight %', 'Impact', 'Risk Level'], *(
+                            [
+                                str(sector_data.get('sector', 'Unknown')),
+                                _cell_text(sector_data.get('weight', 0), '.1f', '%'),
+                                str(sector_data.get('impact', 'Unknown')),
+                                str(sector_data.get('risk_level', 'Unknown'))
+                            ]
+                            for sector_data in affected_sectors
+                            if isinstance(sector_data, dict)
+                        )]
+                        
+                        if len(sectors_table_data) > 1:  # Only create table if we have data
+                            sectors_table = Table(sectors_table_data, colWidths=SECTORS_TABLE_COL_WIDTHS)
+                            sectors_table.setStyle(SECTORS_TABLE_STYLE)
+                            story.append(sectors_table)
+                            story.append(Spacer(1, profile.scenario_gap))
+                
+                # Portfolio Composition if available
+                portfolio_composition = _load_json_object(scenario.portfolio_composition)
+                if portfolio_composition:
+                    story.append(Paragraph("Portfolio Composition:", profile.label_style))
                     
-                    # Portfolio Composition if available
-                    if scenario.portfolio_composition:
-                        try:
-                            portfolio_composition = json.loads(scenario.portfolio_composition)
-                            if portfolio_composition:
-                                story.append(Paragraph("Portfolio Composition:", subheading_style))
-                                
-                                # Create structured table for portfolio composition
-                                comp_table_data = [['Component', 'Details']]
-                                for key, value in portfolio_composition.items():
-                                    if isinstance(value, (int, float)):
-                                        comp_table_data.append([key.replace('_', ' ').title(), f"{value:.2f}"])
-                                    else:
-                                        comp_table_data.append([key.replace('_', ' ').title(), str(value)])
-                                
-                                if len(comp_table_data) > 1:  # Only create table if we have data
-                                    comp_table = Table(comp_table_data, colWidths=[2.0*inch, 3.0*inch])
-                                    comp_table.setStyle(TableStyle([
-                                        ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
-                                        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-                                        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                                        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                                        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-                                        ('FONTSIZE', (0, 0), (-1, -1), 9),
-                                        ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-                                        ('TOPPADDING', (0, 0), (-1, -1), 6),
-                                        ('GRID', (0, 0), (-1, -1), 0.5, colors.lightgrey),
-                                        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey]),
-                                    ]))
-                                    story.append(comp_table)
-                                    story.append(Spacer(1, 15))
-                        except:
-                            pass
+                    comp_table_data = [['Component', 'Details'], *(
+                        [_pretty_key(key), _cell_text(value, '.2f')]
+                        for key, value in portfolio_composition.items()
+                    )]
                     
-                    # Add separator between scenarios
-                    if i < len(latest_scenarios):
-                        story.append(Spacer(1, 20))
-                        story.append(Paragraph("─" * 80, normal_style))  # Visual separator
-                        story.append(Spacer(1, 20))
-            
-            # Footer
+                    comp_table = Table(comp_table_data, colWidths=COMPOSITION_TABLE_COL_WIDTHS)
+                    comp_table.setStyle(DETAIL_TABLE_STYLE)
+                    story.append(comp_table)
+                    story.append(Spacer(1, profile.scenario_gap))
+        
+        # Footer
+        if profile.detailed:
             story.append(Spacer(1, 30))
-            story.append(Paragraph("─" * 80, header_footer_style))
+            story.append(Paragraph("─" * 80, HEADER_FOOTER_STYLE))
             story.append(Paragraph("End of Report", normal_style))
-            story.append(Paragraph("Generated by AI-Powered Risk & Scenario Advisor", header_footer_style))
-            story.append(Paragraph("─" * 80, header_footer_style))
-            
-            # Build PDF
-            print("🔨 Building PDF document")
-            doc.build(story)
-            pdf_data = buffer.getvalue()
-            buffer.close()
+            story.append(Paragraph("Generated by AI-Powered Risk & Scenario Advisor", HEADER_FOOTER_STYLE))
+            story.append(Paragraph("─" * 80, HEADER_FOOTER_STYLE))
+        else:
+            story.append(Spacer(1, profile.section_gap))
+            story.append(Paragraph("End of Report", normal_style))
+        
+        return story
+    
+    def _render_pdf(self, user: User, session: Session, profile: RenderProfile, include_risk_profile: bool,
+                    include_portfolio: bool, include_scenarios: bool, generated_at: Optional[datetime]) -> bytes:
+        """
+        Render the report with one profile, retrying with its fallback profile and finally as text
+        """
+        generated_at = generated_at or datetime.now()
+        start_time = time.time()
+        buffer = io.BytesIO()
+        try:
+            app_logger.debug(f"Starting {profile.name} PDF export for user {user.email}")
+            doc = self._new_pdf_doc(buffer)
+            story = self._build_story(user, session, profile, include_risk_profile, include_portfolio,
+                                      include_scenarios, generated_at)
+            pdf_data = self._build_pdf(doc, buffer, story)
             
             generation_time = time.time() - start_time
-            print(f"✅ PDF generated successfully in {generation_time:.2f} seconds")
-            
+            app_logger.debug(f"{profile.name.capitalize()} PDF generated successfully in {generation_time:.2f} seconds")
             return pdf_data
             
         except Exception as e:
-            print(f"❌ PDF generation error: {e}")
+            app_logger.error(f"{profile.name.capitalize()} PDF generation failed: {e}")
             buffer.close()
-            print("🔄 Attempting fallback PDF generation...")
-            # Try fallback PDF generation
-            try:
-                return self.export_to_pdf_simple(user, session, include_risk_profile, include_portfolio, include_scenarios)
-            except:
-                print("🔄 Fallback PDF failed, trying ultra-fast method...")
-                # Try ultra-fast method
-                try:
-                    return self.export_to_pdf_fast(user, session, include_risk_profile, include_portfolio, include_scenarios)
-                except:
-                    # Final fallback to text
-                    text_content = self.export_to_text(user, session, include_risk_profile, include_portfolio, include_scenarios)
-                    return text_content.encode('utf-8')
\ No newline at end of file
+            if profile.fallback is not None:
+                app_logger.warning(f"Attempting {profile.fallback.name} PDF generation...")
+                return self._render_pdf(user, session, profile.fallback, include_risk_profile, include_portfolio,
+                                        include_scenarios, generated_at)
+            # Final fallback to text
+            text_content = self.export_to_text(user, session, include_risk_profile, include_portfolio, include_scenarios, generated_at)
+            return text_content.encode('utf-8')
+    
+    def export_to_pdf_simple(self, user: User, session: Session, include_risk_profile: bool = True,
+                     include_portfolio: bool = True, include_scenarios: bool = True,
+                     generated_at: Optional[datetime] = None) -> bytes:
+        """
+        Fallback PDF export method - creates a simple PDF without charts for reliability
+        """
+        return self._render_pdf(user, session, SIMPLE_PDF_PROFILE, include_risk_profile, include_portfolio,
+                                include_scenarios, generated_at)
+    
+    def export_to_pdf_fast(self, user: User, session: Session, include_risk_profile: bool = True,
+                          include_portfolio: bool = True, include_scenarios: bool = True,
+                          generated_at: Optional[datetime] = None) -> bytes:
+        """
+        Ultra-fast PDF export method - no charts, minimal styling for maximum speed
+        """
+        return self._render_pdf(user, session, FAST_PDF_PROFILE, include_risk_profile, include_portfolio,
+                                include_scenarios, generated_at)
+    
+    def export_to_pdf(self, user: User, session: Session, include_risk_profile: bool = True,
+                     include_portfolio: bool = True, include_scenarios: bool = True,
+                     generated_at: Optional[datetime] = None) -> bytes:
+        """
+        Export user's analysis results to PDF format with improved formatting (NO CHARTS) for maximum speed
+        """
+        return self._render_pdf(user, session, STANDARD_PDF_PROFILE, include_risk_profile, include_portfolio,
+                                include_scenarios, generated_at)
@@ -7,6 +7,7 @@ import plotly.express as px
 import pandas as pd
 from backend.utils.retry import retry_with_backoff
 from backend.utils.logger import app_logger
+from backend.utils import json_utils
 import time
 
 class PortfolioService:
@@ -306,6 +307,23 @@ class PortfolioService:
             "holdings_bar_chart": holdings_fig.to_json()
         }
 
+    def get_portfolio_visualizations(self, portfolio: Portfolio, holdings_data: List[Dict[str, Any]]) -> Dict[str, str]:
+        """
+        Returns the portfolio's stored chart JSON, rendering it when none was stored.
+
+        Args:
+            portfolio (Portfolio): The saved portfolio.
+            holdings_data (List[Dict[str, Any]]): The portfolio's holdings as dicts.
+
+        Returns:
+            Dict[str, str]: A dictionary of plots in JSON format.
+        """
+        if portfolio.visualizations_cache:
+            return json_utils.loads(portfolio.visualizations_cache)
+
+        # Read paths never write; the cache is only filled when a portfolio is analyzed
+        return self.visualize_portfolio(holdings_data)
+
     def analyze_portfolio(self, input_text: str, user: User, session: Session) -> Dict[str, Any]:
         """
         Orchestrates the full portfolio analysis flow: parsing input, fetching data,
@@ -362,16 +380,19 @@ class PortfolioService:
             portfolio = Portfolio(
                 user_id=user.id,
                 name=f"Portfolio {len(user.portfolios) + 1}",
-                total_value=total_value
+                total_value=total_value,
+                # Holdings never change after analysis, so the charts are rendered once here
+                visualizations_cache=json_utils.dumps(visualizations)
             )
             session.add(portfolio)
-            session.commit()
-            session.refresh(portfolio)
+            # Flush for the portfolio id; portfolio and holdings commit together
+            session.flush()
+            portfolio_id = portfolio.id
             
             # Save holdings
             for holding_data in valid_holdings:
                 holding = Holding(
-                    portfolio_id=portfolio.id,
+                    portfolio_id=portfolio_id,
                     company_name=holding_data['company_name'],
                     symbol=holding_data['symbol'],
                     quantity=holding_data['quantity'],
@@ -386,7 +407,7 @@ class PortfolioService:
             session.commit()
             
             return {
-                'portfolio_id': portfolio.id,
+                'portfolio_id': portfolio_id,
                 'valid_holdings': valid_holdings,
                 'invalid_holdings': invalid_holdings,
                 'total_value': total_value,
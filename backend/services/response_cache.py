@@ -0,0 +1,100 @@
+import redis
+import os
+from typing import Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Generation counters outlive the cached hashes by a wide margin, so a reader
+# that started before an invalidation can't see the counter reset to its value
+GENERATION_TTL_SECONDS = 24 * 60 * 60
+
+class ResponseCache:
+    """
+    Per-user cache of serialized GET responses, kept in a Redis hash.
+
+    Each user also has a generation counter that invalidate() bumps. get()
+    returns the generation seen before the database read and set() only stores
+    the body if it is still current, so a reader that raced a write can't
+    cache the pre-write response.
+    """
+
+    def __init__(self):
+        self.redis_url = os.getenv("REDIS_URL", "redis://localhost:6379")
+        self.ttl_seconds = int(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "120"))
+        self.redis_enabled = os.getenv("REDIS_ENABLED", "false").lower() == "true"
+
+        self.redis_client = None
+        if self.redis_enabled:
+            try:
+                self.redis_client = redis.from_url(self.redis_url, socket_connect_timeout=2)
+                self.redis_client.ping()
+                logger.info("✅ Redis connected successfully. Response caching enabled.")
+            except Exception as e:
+                logger.warning(f"⚠️ Redis connection failed: {e}. Response caching will be disabled.")
+                self.redis_client = None
+        else:
+            logger.info("ℹ️ Redis disabled via configuration. Response caching will be disabled.")
+
+    def _key(self, user_id: int) -> str:
+        return f"response_cache:user:{user_id}"
+
+    def _generation_key(self, user_id: int) -> str:
+        return f"response_cache:generation:{user_id}"
+
+    def get(self, user_id: int, name: str) -> Tuple[Optional[bytes], Optional[bytes]]:
+        """
+        Return (cached body or None on a miss, generation to pass to set)
+        """
+        if not self.redis_client:
+            return None, None
+        try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.hget(self._key(user_id), name)
+            pipe.get(self._generation_key(user_id))
+            body, generation = pipe.execute()
+            return body, generation
+        except Exception as e:
+            logger.error(f"Response cache read error: {e}")
+            return None, None
+
+    def set(self, user_id: int, name: str, body: bytes, generation: Optional[bytes]) -> None:
+        """
+        Cache a response body unless the user's data was invalidated since the
+        generation was read; the user's whole entry expires after the TTL
+        """
+        if not self.redis_client:
+            return
+        generation_key = self._generation_key(user_id)
+        try:
+            with self.redis_client.pipeline() as pipe:
+                # An invalidate() between WATCH and EXEC aborts the write
+                pipe.watch(generation_key)
+                if pipe.get(generation_key) != generation:
+                    return
+                key = self._key(user_id)
+                pipe.multi()
+                pipe.hset(key, name, body)
+                pipe.expire(key, self.ttl_seconds)
+                pipe.execute()
+        except redis.WatchError:
+            pass
+        except Exception as e:
+            logger.error(f"Response cache write error: {e}")
+
+    def invalidate(self, user_id: int) -> None:
+        """Drop every cached response for a user after their data changes"""
+        if not self.redis_client:
+            return
+        try:
+            generation_key = self._generation_key(user_id)
+            pipe = self.redis_client.pipeline()
+            pipe.incr(generation_key)
+            pipe.expire(generation_key, GENERATION_TTL_SECONDS)
+            pipe.delete(self._key(user_id))
+            pipe.execute()
+        except Exception as e:
+            logger.error(f"Response cache invalidation error: {e}")
+
+# Global response cache instance
+response_cache = ResponseCache()
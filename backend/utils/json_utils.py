@@ -0,0 +1,41 @@
+import json
+from typing import Any, Dict, Optional, Union
+
+import orjson
+
+# numpy scalars show up in analysis results; non-str keys in sector maps
+JSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+# orjson.JSONDecodeError subclasses this, so it covers both parsers
+JSONDecodeError = json.JSONDecodeError
+
+def dumps(obj: Any) -> str:
+    """Serialize to JSON text for the TEXT JSON columns"""
+    return orjson.dumps(obj, option=JSON_OPTIONS).decode()
+
+def loads(data: Union[str, bytes]) -> Any:
+    """Parse a JSON column, falling back to stdlib for legacy NaN/Infinity rows"""
+    try:
+        return orjson.loads(data)
+    except orjson.JSONDecodeError:
+        return json.loads(data)
+
+def raw_column(text: Optional[str], default: bytes = b"{}") -> bytes:
+    """Return a stored JSON column as bytes ready to splice into a response"""
+    if not text:
+        return default
+    data = text.encode()
+    # stdlib-written rows may hold NaN/Infinity, which are not valid JSON
+    if b"NaN" in data or b"Infinity" in data:
+        return orjson.dumps(loads(data), option=JSON_OPTIONS)
+    return data
+
+def dumps_with_raw(fields: Dict[str, Any], raw_fields: Dict[str, bytes]) -> bytes:
+    """Serialize an object, splicing already-encoded JSON values in verbatim"""
+    body = orjson.dumps(fields, option=JSON_OPTIONS)
+    if not raw_fields:
+        return body
+    spliced = b",".join(orjson.dumps(key) + b":" + value for key, value in raw_fields.items())
+    if body == b"{}":
+        return b"{" + spliced + b"}"
+    return body[:-1] + b"," + spliced + b"}"
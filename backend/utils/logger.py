@@ -1,7 +1,9 @@
+import atexit
 import logging
 import os
+import queue
 from datetime import datetime
-from logging.handlers import RotatingFileHandler
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
 import sys
 
 def setup_logger(name: str = "investment_advisor") -> logging.Logger:
@@ -37,7 +39,6 @@ def setup_logger(name: str = "investment_advisor") -> logging.Logger:
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setLevel(logging.INFO)
     console_handler.setFormatter(simple_formatter)
-    logger.addHandler(console_handler)
     
     # File handler with rotation
     log_file = os.getenv("LOG_FILE", "app.log")
@@ -48,7 +49,14 @@ def setup_logger(name: str = "investment_advisor") -> logging.Logger:
     )
     file_handler.setLevel(logging.DEBUG)
     file_handler.setFormatter(detailed_formatter)
-    logger.addHandler(file_handler)
+    
+    # Request handlers only enqueue records; a background listener thread does the
+    # formatting and the stdout/file writes so they never block the event loop
+    log_queue = queue.SimpleQueue()
+    logger.addHandler(QueueHandler(log_queue))
+    listener = QueueListener(log_queue, console_handler, file_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
     
     return logger
 
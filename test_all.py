@@ -123,7 +123,7 @@ class TestSuite:
         
         # Optional packages that enhance functionality
         optional_packages = [
-            'sqlmodel', 'reportlab', 'redis'
+            'sqlmodel', 'reportlab', 'redis', 'orjson'
         ]
         
         missing_core = []